@@ -2,24 +2,22 @@
 # COMPATIBILITY FIXES FOR PYTHON 3.11+ AND NUMPY 2.0+
 # Must be applied BEFORE any imports that use chumpy/smplx
 # ============================================================
+import sys
 import inspect
-if not hasattr(inspect, 'getargspec'):
+# inspect.getargspec was removed in Python 3.11
+if sys.version_info >= (3, 11):
     inspect.getargspec = inspect.getfullargspec
 
 import numpy as np
-if not hasattr(np, 'bool'):
+# The np.bool/np.int/... aliases were removed in NumPy 1.24 (np.unicode in
+# 2.0); one version check instead of probing each alias with hasattr()
+if tuple(int(x) for x in np.__version__.split('.')[:2]) >= (1, 24):
     np.bool = np.bool_
-if not hasattr(np, 'int'):
     np.int = np.int_
-if not hasattr(np, 'float'):
     np.float = np.float64
-if not hasattr(np, 'complex'):
     np.complex = np.complex128
-if not hasattr(np, 'object'):
     np.object = np.object_
-if not hasattr(np, 'str'):
     np.str = np.str_
-if not hasattr(np, 'unicode'):
     np.unicode = np.str_
 # ============================================================
 
@@ -335,12 +333,12 @@ class MeasureSMPL(Measurer):
     All the measurements are expressed in cm.
     '''
 
-    def __init__(self):
+    def __init__(self, body_model_root: str = "data"):
         
         super().__init__()
 
         self.model_type = "smpl"
-        self.body_model_root = "data"
+        self.body_model_root = body_model_root
         self.body_model_path = os.path.join(self.body_model_root, 
                                             self.model_type)
 
@@ -411,12 +409,12 @@ class MeasureSMPLX(Measurer):
     All the measurements are expressed in cm.
     '''
 
-    def __init__(self):
+    def __init__(self, body_model_root: str = "data"):
         
         super().__init__()
 
         self.model_type = "smplx"
-        self.body_model_root = "data"
+        self.body_model_root = body_model_root
         self.body_model_path = os.path.join(self.body_model_root, 
                                             self.model_type)
 
@@ -480,12 +478,18 @@ class MeasureSMPLX(Measurer):
 
 
 class MeasureBody():
-    def __new__(cls, model_type):
+    def __new__(cls, model_type, body_model_root="data"):
+        '''
+        :param model_type: str, smpl or smplx
+        :param body_model_root: str, folder containing the smpl/smplx
+                                model folders. Pass an absolute path to
+                                avoid depending on the current working dir.
+        '''
         model_type = model_type.lower()
         if model_type == 'smpl':
-            return MeasureSMPL()
+            return MeasureSMPL(body_model_root)
         elif model_type == 'smplx':
-            return MeasureSMPLX()
+            return MeasureSMPLX(body_model_root)
         else:
             raise NotImplementedError("Model type not defined")
 
@@ -90,6 +90,105 @@ def load_hmr2_no_renderer(checkpoint_path):
     model = HMR2.load_from_checkpoint(checkpoint_path, strict=False, cfg=model_cfg, init_renderer=False)
     return model, model_cfg
 
+def process_image(img_path, out_folder, model, model_cfg, detector, device, batch_size=1):
+    """
+    Detect people in one image and save a mesh + SMPL params per person.
+
+    Returns:
+        Number of people detected
+    """
+    img_path = Path(img_path)
+    img_cv2 = cv2.imread(str(img_path))
+    
+    # Detect humans with YOLO
+    det_out = detector(img_cv2)
+    det_instances = det_out['instances']
+    valid_idx = (det_instances.pred_classes == 0) & (det_instances.scores > 0.5)
+    boxes = det_instances.pred_boxes.tensor[valid_idx].cpu().numpy()
+    
+    if len(boxes) == 0:
+        print(f"  ⚠️  No humans detected")
+        return 0
+    
+    print(f"  ✓ Detected {len(boxes)} person(s)")
+    
+    # Create dataset and run HMR2
+    dataset = ViTDetDataset(model_cfg, img_cv2, boxes)
+    dataloader = torch.utils.data.DataLoader(dataset, batch_size=batch_size, shuffle=False, num_workers=0)
+    
+    for person_idx, batch in enumerate(dataloader):
+        batch = recursive_to(batch, device)
+        
+        with torch.no_grad():
+            out = model(batch)
+        
+        pred_vertices = out['pred_vertices']
+        pred_cam = out['pred_cam']
+        
+        # Save meshes
+        n_in_batch = pred_vertices.shape[0]
+        for i in range(n_in_batch):
+            person_id = person_idx * batch_size + i
+            
+            vertices = pred_vertices[i].cpu().numpy()
+            faces = model.smpl.faces
+            
+            mesh = trimesh.Trimesh(vertices, faces, process=False)
+            mesh_filename = f"{img_path.stem}_person{person_id}.obj"
+            mesh_path = Path(out_folder) / mesh_filename
+            mesh.export(str(mesh_path))
+            
+            print(f"  ✓ Saved mesh: {mesh_filename}")
+            
+            # Also save SMPL parameters
+            # Every entry is a plain float32 array (missing params are
+            # omitted rather than stored as None), so the .npz contains
+            # no object arrays and loads with allow_pickle=False
+            smpl_params = {
+                'pred_cam': pred_cam[i].cpu().numpy().astype(np.float32),
+                'pred_vertices': vertices.astype(np.float32),
+            }
+            for key in ('betas', 'body_pose', 'global_orient'):
+                if key in out['pred_smpl_params']:
+                    smpl_params[key] = out['pred_smpl_params'][key][i].cpu().numpy().astype(np.float32)
+            
+            params_filename = f"{img_path.stem}_person{person_id}_params.npz"
+            params_path = Path(out_folder) / params_filename
+            np.savez(str(params_path), **smpl_params)
+            
+            print(f"  ✓ Saved params: {params_filename}")
+    
+    return len(boxes)
+
+
+def serve(model, model_cfg, detector, device, batch_size=1):
+    """
+    Server mode: keep the models loaded and process one image per stdin line.
+
+    Each request line is "<image path>\t<output folder>". Replies are single
+    stdout lines starting with "@@" ("@@READY" once at startup, then
+    "@@DONE\t<people>" or "@@ERROR\t<message>" per request); any other
+    output is logging.
+    """
+    import sys
+    import traceback
+    
+    print("@@READY", flush=True)
+    for line in sys.stdin:
+        line = line.rstrip("\n")
+        if not line:
+            continue
+        try:
+            img_path, out_folder = line.split("\t", 1)
+            os.makedirs(out_folder, exist_ok=True)
+            print(f"\nProcessing: {Path(img_path).name}")
+            n_people = process_image(img_path, out_folder, model, model_cfg, detector, device, batch_size)
+            print(f"@@DONE\t{n_people}", flush=True)
+        except Exception as e:
+            traceback.print_exc()
+            print(f"@@ERROR\t{type(e).__name__}: {e}".replace("\n", " "), flush=True)
+
+
 def main():
     start_time = time.time()
     
@@ -99,6 +198,8 @@ def main():
     parser.add_argument('--out_folder', type=str, default='demo_out')
     parser.add_argument('--batch_size', type=int, default=1)
     parser.add_argument('--file_type', nargs='+', default=['*.jpg', '*.png'])
+    parser.add_argument('--server', action='store_true',
+                        help='Keep models loaded and read "image<TAB>out_folder" requests from stdin')
     
     args = parser.parse_args()
     
@@ -119,6 +220,10 @@ def main():
     print("\n📦 Loading YOLO detector...")
     detector = YOLOPredictor(confidence=0.5)
     
+    if args.server:
+        serve(model, model_cfg, detector, device, args.batch_size)
+        return
+    
     os.makedirs(args.out_folder, exist_ok=True)
     
     # Get all images (skip macOS hidden files starting with ._)
@@ -134,64 +239,8 @@ def main():
     total_people = 0
     for img_idx, img_path in enumerate(img_paths):
         print(f"\n[{img_idx+1}/{len(img_paths)}] Processing: {img_path.name}")
-        
-        img_cv2 = cv2.imread(str(img_path))
-        
-        # Detect humans with YOLO
-        det_out = detector(img_cv2)
-        det_instances = det_out['instances']
-        valid_idx = (det_instances.pred_classes == 0) & (det_instances.scores > 0.5)
-        boxes = det_instances.pred_boxes.tensor[valid_idx].cpu().numpy()
-        
-        if len(boxes) == 0:
-            print(f"  ⚠️  No humans detected")
-            continue
-        
-        print(f"  ✓ Detected {len(boxes)} person(s)")
-        total_people += len(boxes)
-        
-        # Create dataset and run HMR2
-        dataset = ViTDetDataset(model_cfg, img_cv2, boxes)
-        dataloader = torch.utils.data.DataLoader(dataset, batch_size=args.batch_size, shuffle=False, num_workers=0)
-        
-        for person_idx, batch in enumerate(dataloader):
-            batch = recursive_to(batch, device)
-            
-            with torch.no_grad():
-                out = model(batch)
-            
-            pred_vertices = out['pred_vertices']
-            pred_cam = out['pred_cam']
-            
-            # Save meshes
-            batch_size = pred_vertices.shape[0]
-            for i in range(batch_size):
-                person_id = person_idx * args.batch_size + i
-                
-                vertices = pred_vertices[i].cpu().numpy()
-                faces = model.smpl.faces
-                
-                mesh = trimesh.Trimesh(vertices, faces, process=False)
-                mesh_filename = f"{img_path.stem}_person{person_id}.obj"
-                mesh_path = Path(args.out_folder) / mesh_filename
-                mesh.export(str(mesh_path))
-                
-                print(f"  ✓ Saved mesh: {mesh_filename}")
-                
-                # Also save SMPL parameters
-                smpl_params = {
-                    'pred_cam': pred_cam[i].cpu().numpy(),
-                    'pred_vertices': vertices,
-                    'betas': out['pred_smpl_params']['betas'][i].cpu().numpy() if 'betas' in out['pred_smpl_params'] else None,
-                    'body_pose': out['pred_smpl_params']['body_pose'][i].cpu().numpy() if 'body_pose' in out['pred_smpl_params'] else None,
-                    'global_orient': out['pred_smpl_params']['global_orient'][i].cpu().numpy() if 'global_orient' in out['pred_smpl_params'] else None,
-                }
-                
-                params_filename = f"{img_path.stem}_person{person_id}_params.npz"
-                params_path = Path(args.out_folder) / params_filename
-                np.savez(str(params_path), **smpl_params)
-                
-                print(f"  ✓ Saved params: {params_filename}")
+        total_people += process_image(img_path, args.out_folder, model, model_cfg,
+                                      detector, device, args.batch_size)
     
     end_time = time.time()
     print(f"\n{'='*60}")
@@ -204,4 +253,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-
@@ -168,6 +168,51 @@ def download_photo(photo_url: str, output_path: Path) -> bool:
         return False
 
 
+# Output files PUT to storage at once
+UPLOAD_WORKERS = 4
+# Extra attempts per presigned upload before giving up on it
+UPLOAD_RETRIES = 1
+# When the backend sent upload URLs, only these files are still returned
+# base64-encoded if their upload fails (the job can't finish without them);
+# any other failed upload is just reported in failed_uploads
+INLINE_FALLBACK_KEYS = {"avatar_glb"}
+
+
+def upload_session():
+    """HTTP session shared by all uploads of a job (one connection pool)."""
+    if USE_HTTPX:
+        return httpx.Client(timeout=120.0)
+    return requests.Session()
+
+
+def upload_file(target: dict, file_path: Path, session=None) -> bool:
+    """
+    PUT a file to a presigned storage upload URL.
+
+    Args:
+        target: {"upload_url", "public_url", "content_type"} from the backend
+        file_path: Local file to upload (streamed from disk)
+        session: Client from upload_session() (a new one is opened if None)
+    """
+    if session is None:
+        with upload_session() as session:
+            return upload_file(target, file_path, session)
+    
+    headers = {"content-type": target.get("content_type", "application/octet-stream")}
+    for attempt in range(UPLOAD_RETRIES + 1):
+        try:
+            with open(file_path, "rb") as f:
+                if USE_HTTPX:
+                    response = session.put(target["upload_url"], content=f, headers=headers)
+                else:
+                    response = session.put(target["upload_url"], data=f, headers=headers, timeout=120)
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            print(f"[Handler] Failed to upload {file_path.name} (attempt {attempt + 1}): {e}")
+    return False
+
+
 def standardize_measurements(raw_measurements: dict) -> dict:
     """Convert pipeline measurement names to API-expected names."""
     standardized = {}
@@ -207,7 +252,9 @@ def handler(event: dict) -> dict:
         event: Job input with photo_url, height, weight, gender, user_id
         
     Returns:
-        Dict with avatar_url (base64), measurements, and processing time
+        Dict with file_urls (files uploaded to the backend's presigned
+        upload_urls), files_base64 (only without upload_urls, or the GLB if
+        its upload failed), failed_uploads, measurements, and processing time
     """
     start_time = time.time()
     
@@ -249,7 +296,9 @@ def handler(event: dict) -> dict:
         
         try:
             # Lazy import - only load heavy dependencies when actually processing a job
-            from run_avatar_pipeline import run_pipeline
+            from run_avatar_pipeline import run_pipeline, limit_torch_threads
+            
+            limit_torch_threads()  # idempotent; cheap after the first job
             
             results = run_pipeline(
                 image_path=str(photo_path),
@@ -266,9 +315,8 @@ def handler(event: dict) -> dict:
         if not results.get("success"):
             return {"error": results.get("error", "Pipeline failed")}
         
-        # Collect all output files and encode as base64
-        files_base64 = {}
-        file_sizes = {}
+        # Collect all output files: {file_key: path}
+        collected_files = {}
         
         # Map of file keys to paths (from results or by common filenames)
         output_files = {}
@@ -286,59 +334,74 @@ def handler(event: dict) -> dict:
             })
         
         # Also check for additional files in output_dir by common names
-        additional_files = {
+        output_files.update({
             "face_crop": output_dir / "face_crop.png",
             "avatar_texture": output_dir / "avatar_texture.png",
             "skin_detection_mask": output_dir / "skin_detection_mask.png",
-            # Also check for common GLB names
-            "avatar_glb_alt": output_dir / "avatar_textured.glb",
-        }
+        })
         
-        # Encode all files
         for file_key, file_path in output_files.items():
-            if file_path:
-                file_path = Path(file_path)
-                if file_path.exists():
-                    try:
-                        with open(file_path, "rb") as f:
-                            file_data = f.read()
-                        files_base64[file_key] = base64.b64encode(file_data).decode("utf-8")
-                        file_sizes[file_key] = len(file_data)
-                        print(f"[RunPod] Encoded {file_key}: {len(file_data) / 1024:.1f} KB")
-                    except Exception as e:
-                        print(f"[RunPod] Warning: Failed to encode {file_key}: {e}")
-        
-        for file_key, file_path in additional_files.items():
-            if file_path.exists():
-                try:
-                    with open(file_path, "rb") as f:
-                        file_data = f.read()
-                    files_base64[file_key] = base64.b64encode(file_data).decode("utf-8")
-                    file_sizes[file_key] = len(file_data)
-                    print(f"[RunPod] Encoded {file_key}: {len(file_data) / 1024:.1f} KB")
-                except Exception as e:
-                    print(f"[RunPod] Warning: Failed to encode {file_key}: {e}")
-        
-        # Normalize GLB key (use avatar_glb as standard)
-        if "avatar_glb_alt" in files_base64:
-            if "avatar_glb" not in files_base64:
-                files_base64["avatar_glb"] = files_base64.pop("avatar_glb_alt")
-            else:
-                del files_base64["avatar_glb_alt"]
+            if file_path and Path(file_path).exists():
+                collected_files[file_key] = Path(file_path)
         
-        # Ensure GLB exists
-        if "avatar_glb" not in files_base64:
-            # Try to find any GLB file in output_dir
-            glb_files = list(output_dir.glob("*.glb"))
+        # Ensure GLB exists (common name first, then any GLB in output_dir)
+        if "avatar_glb" not in collected_files:
+            glb_files = [output_dir / "avatar_textured.glb"] + sorted(output_dir.glob("*.glb"))
+            glb_files = [p for p in glb_files if p.exists()]
             if glb_files:
-                glb_path = glb_files[0]
-                with open(glb_path, "rb") as f:
-                    glb_data = f.read()
-                files_base64["avatar_glb"] = base64.b64encode(glb_data).decode("utf-8")
-                file_sizes["avatar_glb"] = len(glb_data)
+                collected_files["avatar_glb"] = glb_files[0]
             else:
                 return {"error": "GLB file not generated"}
         
+        # Files the backend gave us presigned upload URLs for go straight to
+        # storage and only their URLs are returned. base64 (a third bigger,
+        # decoded again by the backend) is left for older backends that
+        # send no upload_urls, and for the GLB if its upload fails.
+        upload_targets = job_input.get("upload_urls") or {}
+        file_urls = {}
+        files_base64 = {}
+        failed_uploads = []
+        file_sizes = {}
+        
+        # Uploads run in parallel over one session (connections reused)
+        to_upload = [file_key for file_key in collected_files if upload_targets.get(file_key)]
+        uploaded = {}
+        if to_upload:
+            from concurrent.futures import ThreadPoolExecutor
+            with upload_session() as session, ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as pool:
+                # (not "results": that's the pipeline output, used below)
+                upload_ok = pool.map(
+                    lambda file_key: upload_file(upload_targets[file_key], collected_files[file_key], session),
+                    to_upload
+                )
+                uploaded = dict(zip(to_upload, upload_ok))
+        
+        for file_key, file_path in collected_files.items():
+            file_sizes[file_key] = file_path.stat().st_size
+            
+            if uploaded.get(file_key):
+                file_urls[file_key] = upload_targets[file_key]["public_url"]
+                print(f"[RunPod] Uploaded {file_key}: {file_sizes[file_key] / 1024:.1f} KB")
+                continue
+            
+            if upload_targets and file_key not in INLINE_FALLBACK_KEYS:
+                # No URL means the backend didn't ask for this file (debug
+                # outputs); only an attempted upload that failed is reported
+                if file_key in to_upload:
+                    print(f"[RunPod] ⚠ Not returning {file_key}: upload failed")
+                    failed_uploads.append(file_key)
+                del file_sizes[file_key]
+                continue
+            
+            try:
+                with open(file_path, "rb") as f:
+                    file_data = f.read()
+                files_base64[file_key] = base64.b64encode(file_data).decode("utf-8")
+                print(f"[RunPod] Encoded {file_key}: {len(file_data) / 1024:.1f} KB")
+            except Exception as e:
+                print(f"[RunPod] Warning: Failed to encode {file_key}: {e}")
+                del file_sizes[file_key]
+        
         # Standardize measurements
         raw_measurements = results.get("measurements", {})
         standardized_measurements = standardize_measurements(raw_measurements)
@@ -346,7 +409,7 @@ def handler(event: dict) -> dict:
         # Ensure height is included
         standardized_measurements["height"] = float(height)
         
-        print(f"[RunPod] Encoded {len(files_base64)} files")
+        print(f"[RunPod] Uploaded {len(file_urls)} files, encoded {len(files_base64)} files")
         print(f"[RunPod] Total size: {sum(file_sizes.values()) / 1024 / 1024:.2f} MB")
         print(f"[RunPod] Measurements: {len(standardized_measurements)} values")
         
@@ -395,8 +458,8 @@ def handler(event: dict) -> dict:
             optional_files = ["skin_texture", "original_mesh", "smpl_params", "tpose_mesh", "apose_mesh", "face_crop"]
             
             files_generated = {
-                "required": {f: f in files_base64 for f in expected_files},
-                "optional": {f: f in files_base64 for f in optional_files}
+                "required": {f: f in file_sizes for f in expected_files},
+                "optional": {f: f in file_sizes for f in optional_files}
             }
             
             verification_results["files_generated"] = files_generated
@@ -444,7 +507,9 @@ def handler(event: dict) -> dict:
         print(f"[RunPod] Complete in {processing_time:.1f}s")
         
         return {
-            "files_base64": files_base64,  # All files as base64 dict
+            "file_urls": file_urls,        # Files uploaded via presigned URLs
+            "files_base64": files_base64,  # Inline fallback (see above)
+            "failed_uploads": failed_uploads,
             "file_sizes": file_sizes,      # Original file sizes for reference
             "measurements": standardized_measurements,
             "processing_time_seconds": round(processing_time, 1),
@@ -11,41 +11,25 @@ Complete pipeline for avatar creation from body photo:
 5. Skin Extraction: Extract skin color from body image
 6. Texture Mapping: Apply skin to avatar and export GLB
 
+Steps 2 and 4 share one batched SMPL forward pass (step2_4_create_poses).
+
 Usage:
     python run_avatar_pipeline.py --image body.jpg --height 175 --gender male --output ./output
 """
 
-# ============================================================
-# COMPATIBILITY FIXES FOR PYTHON 3.11+ AND NUMPY 2.0+
-# Must be applied BEFORE any imports that use chumpy/smplx
-# ============================================================
-import inspect
-if not hasattr(inspect, 'getargspec'):
-    inspect.getargspec = inspect.getfullargspec
-
-import numpy as np
-if not hasattr(np, 'bool'):
-    np.bool = np.bool_
-if not hasattr(np, 'int'):
-    np.int = np.int_
-if not hasattr(np, 'float'):
-    np.float = np.float64
-if not hasattr(np, 'complex'):
-    np.complex = np.complex128
-if not hasattr(np, 'object'):
-    np.object = np.object_
-if not hasattr(np, 'str'):
-    np.str = np.str_
-if not hasattr(np, 'unicode'):
-    np.unicode = np.str_
-# ============================================================
+from __future__ import annotations
 
 import argparse
+import functools
 import json
 import os
 import sys
 import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from types import SimpleNamespace
 from typing import Dict, Optional, Tuple
 
 # Add parent directories to path for imports
@@ -66,6 +50,253 @@ except ImportError:
     CACHE_DIR_4DHUMANS = os.path.join(os.path.expanduser("~"), ".cache", "4DHumans")
 
 
+# numpy (and the chumpy/smplx compat patches) are imported lazily so that
+# --help and argument errors don't pay for them. Bound by _install_compat().
+np = None
+
+
+def _install_compat():
+    """
+    Import numpy and apply the Python 3.11+ / NumPy 2.0+ compatibility fixes.
+
+    Must run BEFORE any imports that use chumpy/smplx. Called by
+    run_pipeline and the step functions; later calls are no-ops.
+    """
+    global np
+    if np is not None:
+        return
+    
+    # inspect.getargspec was removed in Python 3.11
+    if sys.version_info >= (3, 11):
+        import inspect
+        inspect.getargspec = inspect.getfullargspec
+    
+    # The np.bool/np.int/... aliases were removed in NumPy 1.24 (np.unicode
+    # in 2.0). Reassigning them is harmless, so one version check replaces
+    # probing each alias with hasattr().
+    import numpy
+    if tuple(int(x) for x in numpy.__version__.split('.')[:2]) >= (1, 24):
+        numpy.bool = numpy.bool_
+        numpy.int = numpy.int_
+        numpy.float = numpy.float64
+        numpy.complex = numpy.complex128
+        numpy.object = numpy.object_
+        numpy.str = numpy.str_
+        numpy.unicode = numpy.str_
+    np = numpy
+
+
+@functools.lru_cache(maxsize=None)
+def _scan_dir(path: str) -> Dict[str, os.DirEntry]:
+    """
+    List a directory once per pipeline run ({} if it can't be read).
+
+    One scandir() answers existence for every sibling in the directory
+    (file type comes from the directory listing itself), instead of one
+    stat() per probe on a network-mounted RunPod volume.
+    """
+    try:
+        with os.scandir(path) as it:
+            return {entry.name: entry for entry in it}
+    except OSError:
+        return {}
+
+
+@functools.lru_cache(maxsize=None)
+def _stat_path(path: str) -> Optional[os.stat_result]:
+    """
+    stat() a path once per pipeline run (None if missing).
+
+    Missing paths are answered from the parent's _scan_dir listing. The
+    startup checks probe the same cache paths several times, and
+    run_pipeline clears both caches at the start of every run.
+    """
+    parent, name = os.path.split(os.path.normpath(path))
+    try:
+        if not name:  # filesystem root
+            return os.stat(path)
+        entry = _scan_dir(parent or os.curdir).get(name)
+        return entry.stat() if entry is not None else None
+    except OSError:
+        return None
+
+
+def _path_exists(path) -> bool:
+    """Cached Path.exists() replacement for the startup checks."""
+    parent, name = os.path.split(os.path.normpath(os.fspath(path)))
+    if not name:  # filesystem root
+        return os.path.exists(path)
+    entry = _scan_dir(parent or os.curdir).get(name)
+    # is_file()/is_dir() use the listing's d_type; only symlinks need a stat
+    return entry is not None and (entry.is_file() or entry.is_dir())
+
+
+# Negative cache for the model probes: {path: parent dir st_mtime_ns} of
+# model files known to be missing. If the parent directory hasn't changed
+# since, the file still isn't there and the (possibly slow, network volume)
+# lookup is skipped. Cleared after step 1 succeeds, since 4D-Humans
+# downloads any missing models.
+_NEGCACHE_PATH = Path(tempfile.gettempdir()) / ".avatar_pipeline_negcache.json"
+
+
+def _load_negcache() -> Dict[str, int]:
+    try:
+        with open(_NEGCACHE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _model_path_exists(path: Path) -> bool:
+    """_path_exists() for model files, backed by the on-disk negative cache."""
+    parent_stat = _stat_path(str(path.parent))
+    if parent_stat is None:
+        return False
+    
+    negcache = _load_negcache()
+    if negcache.get(str(path)) == parent_stat.st_mtime_ns:
+        return False
+    
+    exists = _path_exists(path)
+    if not exists:
+        negcache[str(path)] = parent_stat.st_mtime_ns
+        try:
+            with open(_NEGCACHE_PATH, "w") as f:
+                json.dump(negcache, f)
+        except OSError:
+            pass
+    return exists
+
+
+def _clear_negcache():
+    try:
+        _NEGCACHE_PATH.unlink()
+    except OSError:
+        pass
+
+
+def _prefetch_file(path: Path, chunk_size: int = 16 * 1024 * 1024):
+    """
+    Read a file once so it sits in the OS page cache.
+
+    The HMR2 checkpoint is loaded by the 4D-Humans subprocess, so the model
+    object itself can't be shared with this process. Reading the ~2.5GB
+    checkpoint from the volume in the background while the startup checks
+    run means the subprocess's torch.load hits RAM instead of the volume.
+    """
+    try:
+        with open(path, 'rb', buffering=0) as f:
+            buf = bytearray(chunk_size)
+            while f.readinto(buf):
+                pass
+    except OSError as e:
+        print(f"  [WARNING] Checkpoint prefetch failed: {e}")
+
+
+def start_checkpoint_prefetch(path: Path) -> threading.Thread:
+    """Start _prefetch_file in a daemon thread and return the thread."""
+    thread = threading.Thread(target=_prefetch_file, args=(path,), daemon=True)
+    thread.start()
+    return thread
+
+
+@functools.lru_cache(maxsize=None)
+def _default_skin_color() -> np.ndarray:
+    """Default skin tone (BGR) used when step 5 fails; shared and read-only."""
+    color = np.array([180, 140, 120], dtype=np.uint8)
+    color.setflags(write=False)
+    return color
+
+
+def limit_torch_threads():
+    """
+    Shrink torch's CPU thread pool; call once from the entry point
+    (main() here, the RunPod handler in the worker).
+
+    SMPL is a tiny skinning graph; on CPU the default one-thread-per-core
+    pool mostly adds contention, especially next to step 5's thread.
+    A thread count pinned via OMP_NUM_THREADS is left alone.
+    """
+    import torch
+
+    if 'OMP_NUM_THREADS' not in os.environ and torch.get_num_threads() > 1:
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // 4))
+
+
+@functools.lru_cache(maxsize=4)
+def _load_smpl(model_path: str, gender: str = 'neutral', num_betas: int = 10):
+    """
+    Load an SMPL body model once per process.
+
+    Steps 2 and 4 both need the same neutral model; parsing the pkl is
+    the slow part, so the loaded module is shared. Callers only run
+    forward passes on it and never modify its parameters.
+    
+    The model is placed on the GPU when one is available (it is tiny, so it
+    can share the GPU with the 4D-Humans subprocess when preloaded); use
+    model.faces and put input tensors on the model's device.
+    """
+    import torch
+    import smplx
+    
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    return smplx.create(
+        model_path,
+        model_type='smpl',
+        gender=gender,
+        num_betas=num_betas
+    ).to(device)
+
+
+# In-flight background SMPL loads, keyed by model path (see start_smpl_preload)
+_SMPL_PRELOAD: Dict[str, Future] = {}
+
+
+def start_smpl_preload(model_path: str):
+    """
+    Load the neutral SMPL model on a background thread.
+
+    Started by run_pipeline before step 1 so the pkl parse overlaps with the
+    4D-Humans run; step2_4_create_poses waits on it, after which _load_smpl
+    is a cache hit.
+    """
+    if model_path in _SMPL_PRELOAD:
+        return
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smpl-preload")
+    _SMPL_PRELOAD[model_path] = executor.submit(_load_smpl, model_path, 'neutral', 10)
+    executor.shutdown(wait=False)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_betas_cached(params_path: str, mtime_ns: int) -> Optional[np.ndarray]:
+    with np.load(params_path, allow_pickle=False) as params:
+        # Extract betas
+        if 'betas' in params:
+            betas = params['betas']
+        elif 'shape' in params:
+            betas = params['shape']
+        else:
+            return None
+    
+    # Ensure correct shape: (10,) float32
+    betas = betas.astype(np.float32).ravel()[:10]
+    if len(betas) < 10:
+        betas = np.pad(betas, (0, 10 - len(betas)), 'constant')
+    betas.setflags(write=False)
+    return betas
+
+
+def load_betas(params_path: Path) -> Optional[np.ndarray]:
+    """
+    Load the 10 SMPL shape coefficients from a 4D-Humans params .npz.
+
+    Steps 2, 3 and 4 all need the betas, so the parsed array is cached per
+    (path, mtime) and shared read-only. Returns None if the file has no
+    betas/shape entry.
+    """
+    return _load_betas_cached(str(params_path), os.stat(params_path).st_mtime_ns)
+
+
 def log_step(step_num: int, title: str, status: str = "start"):
     """Print formatted step header."""
     if status == "start":
@@ -78,34 +309,126 @@ def log_step(step_num: int, title: str, status: str = "start"):
         print(f"[ERROR] Step {step_num} failed: {title}")
 
 
-def step1_extract_body(
+def _4dhumans_env() -> Dict[str, str]:
+    """Environment for the 4D-Humans subprocess (one-shot or worker)."""
+    # Run with unbuffered output to ensure we see errors immediately
+    env = os.environ.copy()
+    env['PYTHONUNBUFFERED'] = '1'
+    
+    # Keep torch.compile/Triton kernel caches on the cache volume next to
+    # the models so a fresh pod reuses them instead of recompiling.
+    # Explicit settings from the environment win.
+    jit_cache_dir = Path(CACHE_DIR_4DHUMANS) / "jit_cache"
+    env.setdefault('TORCHINDUCTOR_CACHE_DIR', str(jit_cache_dir / "inductor"))
+    env.setdefault('TRITON_CACHE_DIR', str(jit_cache_dir / "triton"))
+    return env
+
+
+# Long-lived `demo_yolo.py --server` process (opt-in via TRYON_4DHUMANS_SERVER).
+# It keeps torch, HMR2 and YOLO loaded between jobs in the same worker, and
+# is fed one "image<TAB>out_dir" line per job over stdin. Lines it prints
+# that start with "@@" are protocol replies; everything else is log output.
+_4DHUMANS_WORKER: Optional[subprocess.Popen] = None
+_4DHUMANS_WORKER_TIMEOUT = 1800  # seconds, same as the one-shot run
+
+
+def _stop_4dhumans_worker():
+    global _4DHUMANS_WORKER
+    if _4DHUMANS_WORKER is not None:
+        _4DHUMANS_WORKER.kill()
+        _4DHUMANS_WORKER.wait()
+        _4DHUMANS_WORKER = None
+
+
+def _read_4dhumans_reply(worker: subprocess.Popen) -> Optional[str]:
+    """Relay worker log lines until a protocol line; None if it exited."""
+    for line in worker.stdout:
+        if line.startswith("@@"):
+            return line.rstrip("\n")
+        sys.stdout.write(line)
+    return None
+
+
+def _run_4dhumans_worker(
     image_path: Path,
     output_dir: Path,
-    four_d_humans_dir: Path
-) -> Tuple[Optional[Path], Optional[Path]]:
+    four_d_humans_dir: Path,
+    demo_script: Path
+) -> bool:
     """
-    Step 1: Run 4D-Humans to extract SMPL parameters from body image.
-    
+    Run 4D-Humans on one image in the persistent worker, starting it if needed.
+
     Returns:
-        Tuple of (mesh_path, params_path) or (None, None) on failure
+        True if the worker processed the image, False if the caller should
+        fall back to a one-shot demo_yolo.py run
     """
-    log_step(1, "4D-Humans Body Extraction")
+    global _4DHUMANS_WORKER
     
+    # Kill the worker if a request hangs (the pipe reads below block)
+    watchdog = threading.Timer(_4DHUMANS_WORKER_TIMEOUT, _stop_4dhumans_worker)
+    watchdog.daemon = True
+    watchdog.start()
+    try:
+        if _4DHUMANS_WORKER is None or _4DHUMANS_WORKER.poll() is not None:
+            print(f"  Starting persistent 4D-Humans worker...")
+            sys.stdout.flush()
+            _4DHUMANS_WORKER = subprocess.Popen(
+                [sys.executable, str(demo_script), "--server", "--batch_size", "1"],
+                cwd=str(four_d_humans_dir),
+                env=_4dhumans_env(),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                bufsize=1
+            )
+            if _read_4dhumans_reply(_4DHUMANS_WORKER) != "@@READY":
+                print(f"  [WARNING] 4D-Humans worker failed to start")
+                _stop_4dhumans_worker()
+                return False
+        
+        # Absolute paths: the worker's cwd is the 4D-Humans checkout
+        _4DHUMANS_WORKER.stdin.write(
+            f"{os.path.abspath(image_path)}\t{os.path.abspath(output_dir)}\n"
+        )
+        _4DHUMANS_WORKER.stdin.flush()
+        reply = _read_4dhumans_reply(_4DHUMANS_WORKER)
+        if reply is None:
+            print(f"  [WARNING] 4D-Humans worker exited unexpectedly")
+            _stop_4dhumans_worker()
+            return False
+        if not reply.startswith("@@DONE"):
+            print(f"  [ERROR] 4D-Humans worker: {reply[2:]}")
+            return False
+        return True
+    except (OSError, ValueError) as e:
+        print(f"  [WARNING] 4D-Humans worker error: {e}")
+        _stop_4dhumans_worker()
+        return False
+    finally:
+        watchdog.cancel()
+
+
+def _run_4dhumans_once(
+    image_path: Path,
+    output_dir: Path,
+    four_d_humans_dir: Path,
+    demo_script: Path
+) -> bool:
+    """Run demo_yolo.py once as a fresh subprocess on a single-image folder."""
     # Create temp input folder (demo_yolo.py expects a folder)
-    import tempfile
     import shutil
     
     temp_input = Path(tempfile.mkdtemp())
-    shutil.copy(image_path, temp_input / image_path.name)
-    
-    print(f"  Input image: {image_path}")
-    print(f"  Output dir: {output_dir}")
-    
-    # Run demo_yolo.py
-    demo_script = four_d_humans_dir / "demo_yolo.py"
-    if not demo_script.exists():
-        print(f"  [ERROR] demo_yolo.py not found at {demo_script}")
-        return None, None
+    # Link rather than copy the image: hardlink when on the same filesystem,
+    # else symlink, and only copy if neither is possible
+    temp_image = temp_input / image_path.name
+    try:
+        os.link(image_path, temp_image)
+    except OSError:
+        try:
+            os.symlink(image_path.resolve(), temp_image)
+        except OSError:
+            shutil.copy(image_path, temp_image)
     
     cmd = [
         sys.executable,
@@ -120,81 +443,78 @@ def step1_extract_body(
     sys.stdout.flush()
     
     try:
-        # Run with unbuffered output to ensure we see errors immediately
-        env = os.environ.copy()
-        env['PYTHONUNBUFFERED'] = '1'
-        
-        # Use Popen with real-time output streaming instead of capture_output
-        # This allows us to see download progress immediately
-        process = subprocess.Popen(
+        # The child inherits our stdout/stderr, so 4D-Humans output (including
+        # model download progress) reaches the terminal/RunPod logs directly
+        # without a Python reader thread relaying every line or a pipe that
+        # can fill up and stall it. stdin is closed so nothing can block
+        # waiting for input in a headless worker.
+        result = subprocess.run(
             cmd,
             cwd=str(four_d_humans_dir),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,  # Merge stderr into stdout
-            text=True,
-            bufsize=1,  # Line buffered
-            env=env
+            env=_4dhumans_env(),
+            stdin=subprocess.DEVNULL,
+            timeout=1800,  # 30 minute timeout for downloads
+            check=False
         )
-        
-        # Stream output line by line in real-time
-        stdout_lines = []
-        try:
-            import select
-            import threading
-            
-            # Use threading to read stdout without blocking
-            def read_stdout():
-                for line in iter(process.stdout.readline, ''):
-                    if line:
-                        line = line.rstrip()
-                        print(f"  [4D-Humans] {line}")
-                        sys.stdout.flush()
-                        stdout_lines.append(line)
-                process.stdout.close()
-            
-            # Start thread to read stdout
-            stdout_thread = threading.Thread(target=read_stdout, daemon=True)
-            stdout_thread.start()
-            
-            # Wait for process to complete (with timeout)
-            process.wait(timeout=1800)  # 30 minute timeout for downloads
-            
-            # Wait for stdout reading thread to finish
-            stdout_thread.join(timeout=5)
-            
-        except subprocess.TimeoutExpired:
-            process.kill()
-            process.wait()
-            print(f"  [ERROR] 4D-Humans timed out after 30 minutes")
-            print(f"  Command: {' '.join(cmd)}")
-            return None, None
-        
-        returncode = process.returncode
-        stdout_text = '\n'.join(stdout_lines)
+        returncode = result.returncode
         
         print(f"\n  [RETURN CODE] {returncode}")
         print(f"  {'='*60}\n")
         
         if returncode != 0:
-            print(f"  [ERROR] 4D-Humans failed with return code {returncode}:")
-            if stdout_text:
-                print("  Last 2000 chars of output:")
-                print(stdout_text[-2000:])
-            return None, None
+            print(f"  [ERROR] 4D-Humans failed with return code {returncode} (see output above)")
+            return False
             
     except subprocess.TimeoutExpired as e:
         print(f"  [ERROR] 4D-Humans timed out after {e.timeout}s")
         print(f"  Command: {' '.join(cmd)}")
-        return None, None
+        return False
     except Exception as e:
         print(f"  [ERROR] Exception running 4D-Humans: {e}")
         import traceback
         traceback.print_exc()
-        return None, None
+        return False
     finally:
         # Cleanup temp folder
         shutil.rmtree(temp_input, ignore_errors=True)
     
+    return True
+
+
+def step1_extract_body(
+    image_path: Path,
+    output_dir: Path,
+    four_d_humans_dir: Path
+) -> Tuple[Optional[Path], Optional[Path]]:
+    """
+    Step 1: Run 4D-Humans to extract SMPL parameters from body image.
+    
+    With TRYON_4DHUMANS_SERVER=1 the image is sent to a persistent
+    demo_yolo.py worker (models stay loaded between jobs); otherwise, or if
+    the worker fails, demo_yolo.py runs once as a fresh subprocess.
+    
+    Returns:
+        Tuple of (mesh_path, params_path) or (None, None) on failure
+    """
+    log_step(1, "4D-Humans Body Extraction")
+    
+    print(f"  Input image: {image_path}")
+    print(f"  Output dir: {output_dir}")
+    
+    # Run demo_yolo.py
+    demo_script = four_d_humans_dir / "demo_yolo.py"
+    if not _path_exists(demo_script):
+        print(f"  [ERROR] demo_yolo.py not found at {demo_script}")
+        return None, None
+    
+    ran = False
+    if os.environ.get('TRYON_4DHUMANS_SERVER'):
+        ran = _run_4dhumans_worker(image_path, output_dir, four_d_humans_dir, demo_script)
+        if not ran:
+            print(f"  [WARNING] Falling back to a one-shot 4D-Humans run")
+    if not ran and not _run_4dhumans_once(image_path, output_dir, four_d_humans_dir, demo_script):
+        return None, None
+    
     # Find output files
     mesh_files = list(output_dir.glob("*person0.obj"))
     params_files = list(output_dir.glob("*person0_params.npz"))
@@ -218,17 +538,31 @@ def step1_extract_body(
     return mesh_path, params_path
 
 
-def step2_create_tpose(
+def step2_4_create_poses(
     params_path: Path,
-    output_path: Path,
-    smpl_model_path: Path
-) -> Optional[Path]:
+    tpose_path: Optional[Path],
+    apose_path: Path,
+    smpl_model_path: Path,
+    arm_angle: float = 45.0,
+    betas: Optional[np.ndarray] = None
+) -> Optional[Tuple[Optional[Path], Path, np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
     """
-    Step 2: Generate T-pose mesh for measurements.
+    Steps 2 + 4: Generate the T-pose (measurements) and A-pose (visualization)
+    meshes in a single batched SMPL forward pass.
     
     T-pose = arms horizontal (90 degrees from vertical)
+    A-pose = arms at arm_angle degrees from vertical
+    
+    Both poses share the same betas, so they are evaluated as a batch of two.
+    Returns (T-pose path, A-pose path, T-pose vertices, T-pose joints,
+    A-pose vertices, faces); the T-pose vertices/joints let step 3 measure
+    without another SMPL pass and the A-pose arrays let step 6 skip
+    re-parsing the OBJ.
+    The T-pose OBJ is only a debug artifact; pass tpose_path=None to skip it.
+    Pass betas (from load_betas) to skip reading params_path here.
     """
-    log_step(2, "T-Pose Generation (for measurements)")
+    log_step(2, f"T-Pose + A-Pose Generation (arms at {arm_angle} deg)")
+    _install_compat()
     
     try:
         import torch
@@ -238,77 +572,90 @@ def step2_create_tpose(
         print(f"  [ERROR] Missing dependency: {e}")
         return None
     
-    print(f"  Loading params: {params_path}")
-    params = np.load(params_path, allow_pickle=True)
-    
-    # Extract betas
-    if 'betas' in params:
-        betas = params['betas']
-    elif 'shape' in params:
-        betas = params['shape']
-    else:
-        print("  [ERROR] No betas/shape found in params")
-        return None
-    
-    # Ensure correct shape
-    betas = betas.flatten()
-    if len(betas) > 10:
-        betas = betas[:10]
-    elif len(betas) < 10:
-        betas = np.pad(betas, (0, 10 - len(betas)), 'constant')
+    if betas is None:
+        print(f"  Loading params: {params_path}")
+        betas = load_betas(params_path)
+        if betas is None:
+            print("  [ERROR] No betas/shape found in params")
+            return None
     
     print(f"  Betas shape: {betas.shape}")
     
     # Create SMPL model
     print(f"  Loading SMPL model from: {smpl_model_path}")
+    preload = _SMPL_PRELOAD.pop(str(smpl_model_path), None)
+    if preload is not None:
+        try:
+            preload.result()
+        except Exception as e:
+            print(f"  [WARNING] Background SMPL preload failed, loading now: {e}")
+    smpl_model = _load_smpl(str(smpl_model_path), 'neutral', 10)
     
-    smpl_model = smplx.create(
-        str(smpl_model_path),
-        model_type='smpl',
-        gender='neutral',
-        num_betas=10
-    )
+    # Row 0 = T-pose (all zeros, arms horizontal in SMPL), row 1 = A-pose
+    device = smpl_model.shapedirs.device
+    betas_tensor = torch.tensor(betas, dtype=torch.float32, device=device).unsqueeze(0).repeat(2, 1)
+    global_orient = torch.zeros(2, 3, device=device)
+    body_pose = torch.zeros(2, 69, device=device)  # 23 joints * 3
+    
+    # Set arm angle (45 degrees from vertical = 45 degrees down from horizontal)
+    # In SMPL: 0 = T-pose (horizontal), we rotate down
+    arm_angle_rad = -np.deg2rad(90 - arm_angle)
     
-    # T-pose = all zeros (arms horizontal in SMPL)
-    betas_tensor = torch.from_numpy(betas).float().unsqueeze(0)
-    body_pose = torch.zeros(1, 69)  # 23 joints * 3
-    global_orient = torch.zeros(1, 3)
+    # Left shoulder (joint 16, body_pose index 15)
+    body_pose[1, 15*3 + 2] = arm_angle_rad
+    # Right shoulder (joint 17, body_pose index 16)
+    body_pose[1, 16*3 + 2] = -arm_angle_rad
     
-    print("  Generating T-pose mesh (arms horizontal)...")
+    print(f"  Generating T-pose and A-pose meshes (arms at {arm_angle} deg from vertical)...")
     
-    with torch.no_grad():
+    # inference_mode skips autograd bookkeeping entirely (cheaper than no_grad)
+    with torch.inference_mode():
         output = smpl_model(
             betas=betas_tensor,
             body_pose=body_pose,
             global_orient=global_orient
         )
     
-    vertices = output.vertices[0].cpu().numpy()
+    vertices = output.vertices.cpu().numpy()
+    tpose_vertices = vertices[0]
+    tpose_joints = output.joints[0].cpu().numpy()
     faces = smpl_model.faces
     
-    # Save mesh
-    mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
-    mesh.export(str(output_path))
+    # Save T-pose mesh (debug output only - step 3 uses the vertices directly)
+    if tpose_path is not None:
+        trimesh.Trimesh(vertices=tpose_vertices, faces=faces, process=False).export(str(tpose_path))
+        print(f"  [OK] T-pose mesh saved: {tpose_path.name}")
     
-    print(f"  [OK] T-pose mesh saved: {output_path.name}")
-    print(f"       Vertices: {len(vertices)}, Faces: {len(faces)}")
+    # Save A-pose mesh
+    trimesh.Trimesh(vertices=vertices[1], faces=faces, process=False).export(str(apose_path))
+    print(f"  [OK] A-pose mesh saved: {apose_path.name}")
+    print(f"       Vertices: {len(tpose_vertices)}, Faces: {len(faces)}")
     
-    log_step(2, "T-Pose Generation", "done")
-    return output_path
+    log_step(2, "T-Pose + A-Pose Generation", "done")
+    return tpose_path, apose_path, tpose_vertices, tpose_joints, vertices[1], faces
 
 
 def step3_extract_measurements(
     params_path: Path,
     height_cm: float,
     gender: str,
-    measurements_dir: Path
+    measurements_dir: Path,
+    tpose_vertices: Optional[np.ndarray] = None,
+    tpose_joints: Optional[np.ndarray] = None,
+    betas: Optional[np.ndarray] = None
 ) -> Optional[Dict[str, float]]:
     """
     Step 3: Extract body measurements using SMPL-Anthropometry.
     
     Uses the body branch measurement extraction code.
+    
+    If the neutral T-pose vertices/joints from step 2 are passed in, they are
+    measured directly when the neutral model is used (same betas, zero pose),
+    skipping a second SMPL forward pass. Pass betas (from load_betas) to
+    skip reading params_path here.
     """
     log_step(3, "SMPL-Anthropometry Measurement Extraction")
+    _install_compat()
     
     try:
         import torch
@@ -325,23 +672,17 @@ def step3_extract_measurements(
     print(f"  Height: {height_cm} cm")
     print(f"  Gender: {gender}")
     
-    # Load betas from params
-    params = np.load(params_path, allow_pickle=True)
-    if 'betas' in params:
-        betas = params['betas']
-    elif 'shape' in params:
-        betas = params['shape']
-    else:
-        print("  [ERROR] No betas found in params")
-        return None
+    # Load betas from params (unless the caller already did)
+    if betas is None:
+        betas = load_betas(params_path)
+        if betas is None:
+            print("  [ERROR] No betas found in params")
+            return None
     
-    betas = betas.flatten()[:10]
-    betas_tensor = torch.from_numpy(betas).float().unsqueeze(0)
+    betas_tensor = torch.tensor(betas, dtype=torch.float32).unsqueeze(0)  # copy; cached betas are read-only
     
-    # MeasureSMPL expects "data/smpl" relative to current working directory
-    # Create a symlink or change working directory to point to cache
-    import os
-    original_cwd = os.getcwd()
+    # Load SMPL models straight from the cache by absolute path (no chdir),
+    # so step3 is safe to run alongside the other steps in threads
     cache_data_dir = Path(CACHE_DIR_4DHUMANS) / "data"
     
     # Verify cache directory exists
@@ -349,218 +690,85 @@ def step3_extract_measurements(
         print(f"  [ERROR] Cache data directory does not exist: {cache_data_dir}")
         return None
     
-    smpl_path_in_cache = cache_data_dir / "smpl" / "SMPL_NEUTRAL.pkl"
+    smpl_dir = cache_data_dir / "smpl"
+    smpl_path_in_cache = smpl_dir / "SMPL_NEUTRAL.pkl"
     if not smpl_path_in_cache.exists():
         print(f"  [ERROR] SMPL model not found in cache: {smpl_path_in_cache}")
         return None
     
-    try:
-        # MeasureSMPL expects "data/smpl" relative to current working directory
-        # Best strategy: Change working directory to cache directory parent (/root/.cache/4DHumans)
-        # so that "data/smpl" relative path points directly to the actual cache data
-        cache_dir = Path(CACHE_DIR_4DHUMANS)  # /root/.cache/4DHumans
+    print(f"  ✓ SMPL model verified: {smpl_path_in_cache} exists")
+    
+    # Copy required face segmentation file if it doesn't exist
+    face_seg_file = smpl_dir / "smpl_body_parts_2_faces.json"
+    if not face_seg_file.exists():
+        print(f"  Face segmentation file missing, copying from measurements package...")
+        # Try multiple possible locations for the measurements package
+        possible_dirs = [
+            PROJECT_ROOT / "avatar-creation-measurements",  # /workspace/avatar-creation-measurements
+            PROJECT_ROOT.parent / "avatar-creation-measurements",  # /avatar-creation-measurements (fallback)
+            Path("/workspace/avatar-creation-measurements"),  # Explicit workspace path
+        ]
         
-        # Change working directory to cache directory so "data" relative path works directly
-        os.chdir(str(cache_dir))
-        print(f"  Changed working directory to: {os.getcwd()}")
-        print(f"  Now 'data/smpl' will resolve to: {Path('data/smpl').resolve()}")
+        source_file = None
+        for candidate_dir in possible_dirs:
+            candidate = candidate_dir / "data" / "smpl" / "smpl_body_parts_2_faces.json"
+            print(f"  [DEBUG] Checking: {candidate} (exists: {candidate.exists()})")
+            if candidate.exists():
+                source_file = candidate
+                print(f"  ✓ Found source file at: {source_file}")
+                break
         
-        # Verify the path works
-        expected_smpl_path = Path("data") / "smpl" / "SMPL_NEUTRAL.pkl"
-        if not expected_smpl_path.exists():
-            print(f"  [ERROR] SMPL model not accessible at: {expected_smpl_path.resolve()}")
-            print(f"  Expected absolute path: {cache_data_dir / 'smpl' / 'SMPL_NEUTRAL.pkl'}")
-            return None
+        if source_file is None:
+            print(f"  [ERROR] Source file not found in any of these locations:")
+            for candidate_dir in possible_dirs:
+                print(f"    - {candidate_dir / 'data' / 'smpl' / 'smpl_body_parts_2_faces.json'}")
+            print(f"  [ERROR] Measurements will fail without this file")
+            raise FileNotFoundError(f"Could not find smpl_body_parts_2_faces.json in any expected location")
         
-        print(f"  ✓ SMPL model verified: {expected_smpl_path.resolve()} exists")
-        
-        # Verify gender-specific models exist (they should be downloaded and converted by check_smpl_exists)
-        # If not available, create symlinks as fallback
-        smpl_dir = Path("data") / "smpl"
-        neutral_model = smpl_dir / "SMPL_NEUTRAL.pkl"
-        male_model = smpl_dir / "SMPL_MALE.pkl"
-        female_model = smpl_dir / "SMPL_FEMALE.pkl"
-        
-        if neutral_model.exists():
-            smpl_dir_abs = smpl_dir.resolve()
-            
-            # Check if actual gender-specific models exist (preferred)
-            if not male_model.exists() or not female_model.exists():
-                print(f"  [INFO] Gender-specific models not found, creating symlinks as fallback...")
-                print(f"  [INFO] For better accuracy, ensure basicmodel_m and basicmodel_f are downloaded from Google Drive")
-                
-                # Create symlink for MALE model as fallback
-                male_abs = smpl_dir_abs / "SMPL_MALE.pkl"
-                if not male_abs.exists():
-                    try:
-                        os.symlink("SMPL_NEUTRAL.pkl", str(male_abs))
-                        print(f"  ✓ Created fallback symlink: {male_abs} -> SMPL_NEUTRAL.pkl")
-                    except Exception as e:
-                        print(f"  [WARNING] Could not create fallback symlink for MALE: {e}")
-                
-                # Create symlink for FEMALE model as fallback
-                female_abs = smpl_dir_abs / "SMPL_FEMALE.pkl"
-                if not female_abs.exists():
-                    try:
-                        os.symlink("SMPL_NEUTRAL.pkl", str(female_abs))
-                        print(f"  ✓ Created fallback symlink: {female_abs} -> SMPL_NEUTRAL.pkl")
-                    except Exception as e:
-                        print(f"  [WARNING] Could not create fallback symlink for FEMALE: {e}")
-            else:
-                print(f"  ✓ Using actual gender-specific models (more accurate)")
-                print(f"    - MALE: {male_model.resolve()}")
-                print(f"    - FEMALE: {female_model.resolve()}")
-        
-        # Copy required face segmentation file if it doesn't exist
-        face_seg_file = Path("data") / "smpl" / "smpl_body_parts_2_faces.json"
-        if not face_seg_file.exists():
-            print(f"  Face segmentation file missing, copying from measurements package...")
-            # Try multiple possible locations for the measurements package
-            possible_dirs = [
-                PROJECT_ROOT / "avatar-creation-measurements",  # /workspace/avatar-creation-measurements
-                PROJECT_ROOT.parent / "avatar-creation-measurements",  # /avatar-creation-measurements (fallback)
-                Path("/workspace/avatar-creation-measurements"),  # Explicit workspace path
-            ]
-            
-            source_file = None
-            for measurements_dir in possible_dirs:
-                candidate = measurements_dir / "data" / "smpl" / "smpl_body_parts_2_faces.json"
-                print(f"  [DEBUG] Checking: {candidate} (exists: {candidate.exists()})")
-                if candidate.exists():
-                    source_file = candidate
-                    print(f"  ✓ Found source file at: {source_file}")
-                    break
-            
-            if source_file and source_file.exists():
-                import shutil
-                # Ensure directory exists
-                face_seg_file.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(source_file, face_seg_file)
-                print(f"  ✓ Copied face segmentation file to: {face_seg_file.resolve()}")
-            else:
-                print(f"  [ERROR] Source file not found in any of these locations:")
-                for measurements_dir in possible_dirs:
-                    candidate = measurements_dir / "data" / "smpl" / "smpl_body_parts_2_faces.json"
-                    print(f"    - {candidate}")
-                print(f"  [ERROR] Measurements will fail without this file")
-                raise FileNotFoundError(f"Could not find smpl_body_parts_2_faces.json in any expected location")
-        
-        print("  Creating SMPL measurer...")
-        measurer = MeasureBody("smpl")
-        
-        # Set body model with betas
-        # Convert to uppercase for measurement library (it expects MALE/FEMALE/NEUTRAL)
-        # but smplx.create internally converts to uppercase for filename lookup anyway
-        gender_upper = gender.upper() if gender.lower() in ['male', 'female'] else 'NEUTRAL'
-        print(f"  Using gender: {gender_upper} (will look for SMPL_{gender_upper}.pkl)")
-        measurer.from_body_model(gender=gender_upper, shape=betas_tensor)
-        
-        # Get all possible measurements
-        measurement_names = measurer.all_possible_measurements
-        print(f"  Measuring {len(measurement_names)} body dimensions...")
-        
-        measurer.measure(measurement_names)
-        
-        # Normalize to actual height
-        measurer.height_normalize_measurements(height_cm)
-        
-        # Get normalized measurements
-        measurements = measurer.height_normalized_measurements
-        
-        print(f"\n  Measurements (height-normalized to {height_cm}cm):")
-        for name, value in sorted(measurements.items()):
-            print(f"    {name}: {value:.1f} cm")
-        
-        log_step(3, "Measurement Extraction", "done")
-        return measurements
-        
-    finally:
-        # Restore original working directory
-        try:
-            os.chdir(str(original_cwd))
-            print(f"  Restored working directory to: {original_cwd}")
-        except Exception as e:
-            print(f"  [WARNING] Could not restore working directory: {e}")
-
-
-def step4_create_apose(
-    params_path: Path,
-    output_path: Path,
-    smpl_model_path: Path,
-    arm_angle: float = 45.0
-) -> Optional[Path]:
-    """
-    Step 4: Generate A-pose mesh for visualization.
-    
-    A-pose = arms at 45 degrees from vertical
-    """
-    log_step(4, f"A-Pose Generation (arms at {arm_angle} deg)")
-    
-    try:
-        import torch
-        import trimesh
-        import smplx
-    except ImportError as e:
-        print(f"  [ERROR] Missing dependency: {e}")
-        return None
-    
-    print(f"  Loading params: {params_path}")
-    params = np.load(params_path, allow_pickle=True)
-    
-    # Extract betas
-    if 'betas' in params:
-        betas = params['betas']
-    elif 'shape' in params:
-        betas = params['shape']
+        import shutil
+        shutil.copy2(source_file, face_seg_file)
+        print(f"  ✓ Copied face segmentation file to: {face_seg_file}")
+    
+    print("  Creating SMPL measurer...")
+    measurer = MeasureBody("smpl", body_model_root=str(cache_data_dir))
+    
+    # Set body model with betas
+    # Convert to uppercase for measurement library (it expects MALE/FEMALE/NEUTRAL)
+    gender_upper = gender.upper() if gender.lower() in ['male', 'female'] else 'NEUTRAL'
+    if not (smpl_dir / f"SMPL_{gender_upper}.pkl").exists():
+        # Gender-specific models are optional - fall back to the neutral model
+        # instead of symlinking it into the cache
+        print(f"  [INFO] SMPL_{gender_upper}.pkl not found, using SMPL_NEUTRAL.pkl")
+        print(f"  [INFO] For better accuracy, ensure basicmodel_m and basicmodel_f are downloaded from Google Drive")
+        gender_upper = 'NEUTRAL'
+    print(f"  Using gender: {gender_upper} (SMPL_{gender_upper}.pkl)")
+    if gender_upper == 'NEUTRAL' and tpose_vertices is not None and tpose_joints is not None:
+        # Step 2 already ran the neutral model with these betas in T-pose
+        print("  Reusing T-pose vertices from step 2")
+        measurer.verts = np.asarray(tpose_vertices, dtype=np.float32)
+        measurer.joints = np.asarray(tpose_joints, dtype=np.float32)
+        measurer.gender = gender_upper
     else:
-        print("  [ERROR] No betas/shape found in params")
-        return None
-    
-    betas = betas.flatten()[:10]
-    if len(betas) < 10:
-        betas = np.pad(betas, (0, 10 - len(betas)), 'constant')
-    
-    # Create SMPL model
-    smpl_model = smplx.create(
-        str(smpl_model_path),
-        model_type='smpl',
-        gender='neutral',
-        num_betas=10
-    )
-    
-    betas_tensor = torch.from_numpy(betas).float().unsqueeze(0)
-    global_orient = torch.zeros(1, 3)
-    body_pose = torch.zeros(1, 69)
-    
-    # Set arm angle (45 degrees from vertical = 45 degrees down from horizontal)
-    # In SMPL: 0 = T-pose (horizontal), we rotate down
-    arm_angle_rad = -np.deg2rad(90 - arm_angle)
-    
-    # Left shoulder (joint 16, body_pose index 15)
-    body_pose[0, 15*3 + 2] = arm_angle_rad
-    # Right shoulder (joint 17, body_pose index 16)
-    body_pose[0, 16*3 + 2] = -arm_angle_rad
+        measurer.from_body_model(gender=gender_upper, shape=betas_tensor)
     
-    print(f"  Generating A-pose mesh (arms at {arm_angle} deg from vertical)...")
+    # Get all possible measurements
+    measurement_names = measurer.all_possible_measurements
+    print(f"  Measuring {len(measurement_names)} body dimensions...")
     
-    with torch.no_grad():
-        output = smpl_model(
-            betas=betas_tensor,
-            body_pose=body_pose,
-            global_orient=global_orient
-        )
+    measurer.measure(measurement_names)
     
-    vertices = output.vertices[0].cpu().numpy()
-    faces = smpl_model.faces
+    # Normalize to actual height
+    measurer.height_normalize_measurements(height_cm)
     
-    # Save mesh
-    mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
-    mesh.export(str(output_path))
+    # Get normalized measurements
+    measurements = measurer.height_normalized_measurements
     
-    print(f"  [OK] A-pose mesh saved: {output_path.name}")
+    print(f"\n  Measurements (height-normalized to {height_cm}cm):")
+    for name, value in sorted(measurements.items()):
+        print(f"    {name}: {value:.1f} cm")
     
-    log_step(4, "A-Pose Generation", "done")
-    return output_path
+    log_step(3, "Measurement Extraction", "done")
+    return measurements
 
 
 def step5_extract_skin(
@@ -574,30 +782,34 @@ def step5_extract_skin(
     3. Extract skin color from cropped face only
     """
     log_step(5, "Skin Color Extraction from Face Crop")
+    _install_compat()
     
     try:
         import cv2
-        from PIL import Image
     except ImportError as e:
         print(f"  [ERROR] Missing dependency: {e}")
         return None
     
     print(f"  Loading body image: {body_image_path}")
     
-    image = cv2.imread(str(body_image_path))
+    # Decode at half resolution: the median skin color doesn't change with
+    # 2x downsampling, and the mask/median/cascade work is a quarter of the
+    # pixels. Face crop and detection visualization are half-size too.
+    image = cv2.imread(str(body_image_path), cv2.IMREAD_REDUCED_COLOR_2)
     if image is None:
         print(f"  [ERROR] Could not load image")
         return None
     
     h, w = image.shape[:2]
-    print(f"  Image size: {w}x{h}")
+    print(f"  Image size (half resolution): {w}x{h}")
     
     # Detect face using Haar cascade
     face_cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
     face_cascade = cv2.CascadeClassifier(face_cascade_path)
     
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(50, 50))
+    # minSize is halved along with the image (50x50 at full resolution)
+    faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(25, 25))
     
     if len(faces) > 0:
         # Use the largest face
@@ -638,25 +850,22 @@ def step5_extract_skin(
     # Apply skin color detection within center region
     hsv = cv2.cvtColor(center_region, cv2.COLOR_BGR2HSV)
     
-    # Skin detection in HSV
-    lower_skin1 = np.array([0, 20, 50], dtype=np.uint8)
-    upper_skin1 = np.array([25, 255, 255], dtype=np.uint8)
-    lower_skin2 = np.array([165, 20, 50], dtype=np.uint8)
-    upper_skin2 = np.array([180, 255, 255], dtype=np.uint8)
-    
-    mask1 = cv2.inRange(hsv, lower_skin1, upper_skin1)
-    mask2 = cv2.inRange(hsv, lower_skin2, upper_skin2)
-    skin_mask = cv2.bitwise_or(mask1, mask2)
+    # Skin detection in HSV: hue in [0, 25] or [165, 180] (red wraps around),
+    # saturation >= 20, value >= 50. One fused boolean mask instead of two
+    # cv2.inRange masks plus bitwise_or.
+    hue = hsv[..., 0]
+    skin_mask = ((hue <= 25) | (hue >= 165)) & (hsv[..., 1] >= 20) & (hsv[..., 2] >= 50)
     
     # Get skin pixels
-    skin_pixels = center_region[skin_mask > 0]
+    skin_pixels = center_region[skin_mask]
     
     if len(skin_pixels) < 20:
         print("  [WARNING] Few skin pixels detected, using median of center region")
         skin_color = np.median(center_region.reshape(-1, 3), axis=0)
     else:
-        # Use median for robustness
-        skin_color = np.median(skin_pixels, axis=0)
+        # Use median for robustness. skin_pixels is a fresh copy from boolean
+        # indexing, so let numpy partition it in place instead of sorting a copy
+        skin_color = np.median(skin_pixels, axis=0, overwrite_input=True)
     
     skin_color = skin_color.astype(np.uint8)
     
@@ -665,10 +874,12 @@ def step5_extract_skin(
     print(f"  Skin color (RGB): {skin_color[::-1]}")
     
     # Save skin texture PNG (solid color)
+    # A constant texture samples identically at any size; 4x4 keeps
+    # GPU mipmapping happy without encoding/uploading 512x512 of one color
     texture_path = output_dir / "skin_texture.png"
-    skin_color_rgb = skin_color[::-1]  # BGR to RGB
-    texture_img = np.full((512, 512, 3), skin_color_rgb, dtype=np.uint8)
-    Image.fromarray(texture_img).save(str(texture_path))
+    # skin_color is already BGR, which is what cv2.imwrite expects
+    cv2.imwrite(str(texture_path), solid_texture(tuple(skin_color.tolist())),
+                [cv2.IMWRITE_PNG_COMPRESSION, 1])  # zlib level 1: nothing to gain on 4x4
     
     print(f"  [OK] Skin texture saved: {texture_path.name}")
     
@@ -677,7 +888,7 @@ def step5_extract_skin(
     vis = image.copy()
     if len(faces) > 0:
         fx, fy, fw, fh = largest_face
-        cv2.rectangle(vis, (fx, fy), (fx+fw, fy+fh), (0, 255, 0), 4)  # Green: detected face
+        cv2.rectangle(vis, (fx, fy), (fx+fw, fy+fh), (0, 255, 0), 2)  # Green: detected face
     cv2.imwrite(str(vis_path), vis)
     print(f"  [OK] Detection visualization: {vis_path.name}")
     
@@ -685,32 +896,147 @@ def step5_extract_skin(
     return texture_path, skin_color
 
 
+@functools.lru_cache(maxsize=32)
+def solid_texture(color: Tuple[int, int, int], size: int = 4) -> np.ndarray:
+    """
+    Solid-color texture image, shared read-only between steps 5 and 6.
+
+    Args:
+        color: Channel values in the order the caller writes them (BGR for cv2)
+        size: Edge length in pixels
+
+    Returns:
+        (size, size, 3) uint8 array
+    """
+    texture = np.full((size, size, 3), color, dtype=np.uint8)
+    texture.setflags(write=False)
+    return texture
+
+
+def quantize_glb(glb_path: Path) -> bool:
+    """
+    Shrink an exported GLB in place with gltfpack, if it is installed.
+
+    gltfpack quantizes positions/normals/UVs to 16-bit or smaller
+    (KHR_mesh_quantization), which Three.js GLTFLoader decodes natively.
+    Meshopt/Draco compression is off by default because the web viewers
+    do not register those decoders; set TRYON_GLB_MESHOPT=1 to add
+    gltfpack's EXT_meshopt_compression (-cc) once a viewer supports it.
+
+    Returns:
+        True if the GLB was rewritten, False if gltfpack is unavailable or failed
+    """
+    import shutil
+
+    gltfpack = shutil.which("gltfpack")
+    if gltfpack is None:
+        return False
+
+    packed_path = glb_path.with_suffix(".packed.glb")
+    cmd = [gltfpack, "-i", str(glb_path), "-o", str(packed_path)]
+    if os.environ.get("TRYON_GLB_MESHOPT"):
+        cmd.append("-cc")
+    try:
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            timeout=120
+        )
+    except (subprocess.TimeoutExpired, OSError) as e:
+        print(f"  [WARNING] gltfpack failed: {e}")
+        packed_path.unlink(missing_ok=True)
+        return False
+
+    if result.returncode != 0 or not packed_path.exists():
+        print(f"  [WARNING] gltfpack failed with return code {result.returncode}: {result.stderr.strip()[-500:]}")
+        packed_path.unlink(missing_ok=True)
+        return False
+
+    os.replace(packed_path, glb_path)
+    return True
+
+
+# Avatars processed by the same worker often share a skin tone, so the
+# texture image and material are built once per (color, texture size).
+# Bounded: the worker is long-lived and skin colors vary continuously.
+@functools.lru_cache(maxsize=64)
+def get_skin_material(skin_color_rgb: Tuple[int, int, int], texture_size: int = 4):
+    """
+    Get the PBR material for a solid skin color, creating it on first use.
+
+    Args:
+        skin_color_rgb: Skin color as an (R, G, B) tuple of ints
+        texture_size: Edge length of the solid-color base texture
+
+    Returns:
+        trimesh PBRMaterial with the skin color as base color texture
+    """
+    from PIL import Image
+    from trimesh.visual.material import PBRMaterial
+
+    return PBRMaterial(
+        baseColorTexture=Image.new('RGB', (texture_size, texture_size), skin_color_rgb),
+        baseColorFactor=[1.0, 1.0, 1.0, 1.0],  # No tint, use texture as-is
+        metallicFactor=0.0,
+        roughnessFactor=0.7
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def solid_color_uvs(n_vertices: int) -> np.ndarray:
+    """
+    UV coordinates for a solid-color texture: every vertex samples (0.5, 0.5).
+
+    The skin texture is a single color, so any UV layout renders the same;
+    a constant UV set skips the projection math entirely and compresses
+    well in the GLB. Cached per vertex count (SMPL always has 6890), so
+    the array is shared and read-only.
+    """
+    uvs = np.full((n_vertices, 2), 0.5, dtype=np.float32)
+    uvs.setflags(write=False)
+    return uvs
+
+
 def step6_create_textured_glb(
     mesh_path: Path,
     skin_color: np.ndarray,
     output_path: Path,
-    texture_path: Optional[Path] = None
+    texture_path: Optional[Path] = None,
+    verify: bool = False,
+    vertices: Optional[np.ndarray] = None,
+    faces: Optional[np.ndarray] = None
 ) -> Optional[Path]:
     """
     Step 6: Apply skin texture to mesh using UV mapping and export as GLB.
     
     Uses proper UV texture mapping instead of vertex colors for better
     rendering in web viewers (Three.js, etc.)
+    
+    Set verify=True (or TRYON_VERIFY_GLB=1 / AVATAR_DEBUG=1) to reload the
+    exported GLB as a sanity check.
+    
+    If vertices and faces are given (from step2_4_create_poses), the mesh is
+    built from them directly; mesh_path is only loaded when they are not.
     """
     log_step(6, "UV Texture Mapping & GLB Export")
+    _install_compat()
     
     try:
+        import cv2
         import trimesh
-        from PIL import Image
     except ImportError as e:
         print(f"  [ERROR] Missing dependency: {e}")
         return None
     
-    print(f"  Loading mesh: {mesh_path}")
-    
-    mesh = trimesh.load(str(mesh_path), process=False)
-    if not isinstance(mesh, trimesh.Trimesh):
-        mesh = list(mesh.geometry.values())[0]
+    if vertices is not None and faces is not None:
+        print(f"  Using in-memory mesh (A-pose from step 4)")
+        mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+    else:
+        print(f"  Loading mesh: {mesh_path}")
+        mesh = trimesh.load(str(mesh_path), process=False)
+        if not isinstance(mesh, trimesh.Trimesh):
+            mesh = list(mesh.geometry.values())[0]
     
     # Convert BGR to RGB
     skin_color_rgb = skin_color[::-1].astype(np.uint8)
@@ -718,57 +1044,24 @@ def step6_create_textured_glb(
     print(f"  Skin color (RGB): {skin_color_rgb}")
     print(f"  Vertices: {len(mesh.vertices)}, Faces: {len(mesh.faces)}")
     
-    # Create UV coordinates for the mesh
-    # Simple cylindrical UV projection for SMPL body
-    vertices = mesh.vertices
-    
-    # Normalize vertices for UV mapping
-    v_min = vertices.min(axis=0)
-    v_max = vertices.max(axis=0)
-    v_range = v_max - v_min
-    
-    # Cylindrical UV projection: 
-    # U = atan2(x, z) normalized to [0,1]
-    # V = y normalized to [0,1]
-    x = vertices[:, 0]
-    y = vertices[:, 1]
-    z = vertices[:, 2]
-    
-    # Calculate U coordinate from angle around Y axis
-    u = (np.arctan2(x, z) / (2 * np.pi)) + 0.5
-    
-    # Calculate V coordinate from height
-    v = (y - v_min[1]) / v_range[1]
-    
-    uv = np.column_stack([u, v])
+    # Create UV coordinates for the mesh (constant - the texture is a solid color)
+    uv = solid_color_uvs(len(mesh.vertices))
     
     print(f"  Generated UV coordinates: shape {uv.shape}")
     
-    # Create skin texture image (512x512 solid color)
-    texture_size = 512
-    texture_img = Image.new('RGB', (texture_size, texture_size), 
-                            tuple(skin_color_rgb.tolist()))
-    
-    # Save texture to file
+    # Save skin texture image (4x4 solid color - samples the same as 512x512;
+    # cv2 wants BGR, which skin_color already is)
     if texture_path is None:
         texture_path = output_path.parent / "avatar_texture.png"
-    texture_img.save(str(texture_path))
+    cv2.imwrite(str(texture_path), solid_texture(tuple(skin_color.tolist())),
+                [cv2.IMWRITE_PNG_COMPRESSION, 1])  # zlib level 1: nothing to gain on 4x4
     print(f"  Saved texture: {texture_path.name}")
     
     # Create a textured visual for the mesh with actual texture image
-    from trimesh.visual.material import PBRMaterial
     from trimesh.visual import TextureVisuals
     
-    # Load texture as numpy array for PBR material
-    texture_array = np.array(texture_img)
-    
-    # Create PBR material with the actual texture image
-    material = PBRMaterial(
-        baseColorTexture=Image.fromarray(texture_array),
-        baseColorFactor=[1.0, 1.0, 1.0, 1.0],  # No tint, use texture as-is
-        metallicFactor=0.0,
-        roughnessFactor=0.7
-    )
+    # PBR material with the skin texture (reused across runs with the same color)
+    material = get_skin_material(tuple(skin_color_rgb.tolist()))
     
     # Apply texture visual with UV coordinates and material
     mesh.visual = TextureVisuals(uv=uv, material=material)
@@ -777,20 +1070,27 @@ def step6_create_textured_glb(
     
     # Export as GLB (binary glTF)
     mesh.export(str(output_path), file_type='glb')
-    
+
+    if quantize_glb(output_path):
+        print(f"  Quantized GLB with gltfpack (KHR_mesh_quantization)")
+
     file_size = output_path.stat().st_size / 1024
     print(f"  [OK] GLB exported: {output_path.name} ({file_size:.1f} KB)")
     
-    # Verify the export contains proper data
-    try:
-        test_load = trimesh.load(str(output_path))
-        if hasattr(test_load, 'geometry'):
-            for name, geom in test_load.geometry.items():
-                print(f"  Verified geometry '{name}': {len(geom.vertices)} vertices")
-        else:
-            print(f"  Verified: {len(test_load.vertices)} vertices")
-    except Exception as e:
-        print(f"  [WARNING] Verification failed: {e}")
+    # Verify the export contains proper data (debug only - full GLB reparse)
+    if verify or os.environ.get('TRYON_VERIFY_GLB') or os.environ.get('AVATAR_DEBUG'):
+        try:
+            test_load = trimesh.load(str(output_path))
+            if hasattr(test_load, 'geometry'):
+                for name, geom in test_load.geometry.items():
+                    print(f"  Verified geometry '{name}': {len(geom.vertices)} vertices")
+            else:
+                print(f"  Verified: {len(test_load.vertices)} vertices")
+        except Exception as e:
+            print(f"  [WARNING] Verification failed: {e}")
+    else:
+        # Report what was exported from the in-memory mesh instead
+        print(f"  Exported: {len(mesh.vertices)} vertices")
     
     log_step(6, "UV Texture Mapping & GLB Export", "done")
     return output_path
@@ -820,11 +1120,25 @@ def save_measurements_json(
     print(f"  [OK] Measurements saved: {output_path.name}")
 
 
+def _np_default(o):
+    """json.dump `default=` hook: only called for types json can't encode."""
+    if isinstance(o, np.floating):
+        return float(o)
+    if isinstance(o, np.integer):
+        return int(o)
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    # Paths and anything else: the string form is good enough for the
+    # results JSON, which is informational
+    return str(o)
+
+
 def run_pipeline(
     image_path: str,
     height_cm: float,
     gender: str,
-    output_dir: str
+    output_dir: str,
+    save_debug_meshes: bool = False
 ) -> Dict:
     """
     Run the complete avatar pipeline.
@@ -834,6 +1148,7 @@ def run_pipeline(
         height_cm: User's height in centimeters
         gender: 'male', 'female', or 'neutral'
         output_dir: Directory for output files
+        save_debug_meshes: Also write the T-pose OBJ (not used downstream)
         
     Returns:
         Dict with paths to output files and measurements
@@ -842,18 +1157,33 @@ def run_pipeline(
     print("TRYON MVP AVATAR PIPELINE")
     print("="*60)
     
+    _install_compat()
+    
+    # Fresh stat caches per run (models may have been downloaded since)
+    _scan_dir.cache_clear()
+    _stat_path.cache_clear()
+    
     # Setup paths
     image_path = Path(image_path).resolve()
     output_dir = Path(output_dir).resolve()
     output_dir.mkdir(parents=True, exist_ok=True)
     
+    # All output paths, built once
+    out = SimpleNamespace(
+        tpose=output_dir / "body_tpose.obj",
+        apose=output_dir / "body_apose.obj",
+        measurements=output_dir / "measurements.json",
+        skin_texture=output_dir / "skin_texture.png",
+        glb=output_dir / "avatar_textured.glb",
+    )
+    
     four_d_humans_dir = PROJECT_ROOT / "4D-Humans-clean"
     # Use the cache directory where models are actually stored
     # smplx.create expects a directory containing a 'smpl' subfolder
     smpl_model_path = Path(CACHE_DIR_4DHUMANS) / "data"
     # Try both possible locations for avatar-creation-measurements
     measurements_dir = PROJECT_ROOT / "avatar-creation-measurements"  # /workspace/avatar-creation-measurements (Docker)
-    if not measurements_dir.exists():
+    if not _path_exists(measurements_dir):
         measurements_dir = PROJECT_ROOT.parent / "avatar-creation-measurements"  # Fallback location
     
     # Volume diagnostics: Check if models are cached (check both build cache and volume)
@@ -870,13 +1200,13 @@ def run_pipeline(
     print(f"  Build cache: {build_cache}")
     
     # Check current cache location
-    checkpoint_exists = cache_checkpoint.exists()
-    smpl_exists = cache_smpl.exists()
+    checkpoint_exists = _model_path_exists(cache_checkpoint)
+    smpl_exists = _model_path_exists(cache_smpl)
     
     # Also check build cache if current cache doesn't have models
-    if not checkpoint_exists and build_checkpoint.exists():
+    if not checkpoint_exists and _model_path_exists(build_checkpoint):
         try:
-            build_size = build_checkpoint.stat().st_size / (1024**3)
+            build_size = _stat_path(str(build_checkpoint)).st_size / (1024**3)
             if build_size > 2.0:
                 print(f"  ⚠️  Models found in build cache ({build_size:.2f} GB) but config using different path!")
                 print(f"  Build checkpoint: {build_checkpoint}")
@@ -884,7 +1214,14 @@ def run_pipeline(
         except:
             pass
     
-    print(f"  Checkpoint exists: {checkpoint_exists} ({cache_checkpoint.stat().st_size / (1024**3):.2f} GB)" if checkpoint_exists else f"  Checkpoint exists: False")
+    if checkpoint_exists:
+        # Warm the page cache for step 1 while the rest of startup runs
+        start_checkpoint_prefetch(cache_checkpoint)
+    if smpl_exists:
+        # Load the SMPL model for steps 2/4 while 4D-Humans runs
+        start_smpl_preload(str(smpl_model_path))
+    
+    print(f"  Checkpoint exists: {checkpoint_exists} ({_stat_path(str(cache_checkpoint)).st_size / (1024**3):.2f} GB)" if checkpoint_exists else f"  Checkpoint exists: False")
     print(f"  SMPL model exists: {smpl_exists}")
     if not checkpoint_exists or not smpl_exists:
         print(f"  [NOTE] Models not found in cache. They will be downloaded (~2.5GB, 5-15 min).")
@@ -893,32 +1230,32 @@ def run_pipeline(
     else:
         print(f"  ✓ Models found in cache - ready to use!")
     
-    # Verify paths exist
-    if not four_d_humans_dir.exists():
-        return {
-            "success": False,
-            "error": f"4D-Humans directory not found: {four_d_humans_dir} (PROJECT_ROOT: {PROJECT_ROOT})",
-            "outputs": {}
-        }
-    if not (four_d_humans_dir / "demo_yolo.py").exists():
+    # Verify paths exist - a single stat of demo_yolo.py also proves the
+    # 4D-Humans directory exists; the directory is only probed on failure
+    four_d_humans_exists = _path_exists(four_d_humans_dir / "demo_yolo.py")
+    if not four_d_humans_exists:
+        if not _path_exists(four_d_humans_dir):
+            return {
+                "success": False,
+                "error": f"4D-Humans directory not found: {four_d_humans_dir} (PROJECT_ROOT: {PROJECT_ROOT})",
+                "outputs": {}
+            }
         return {
             "success": False,
             "error": f"demo_yolo.py not found at: {four_d_humans_dir / 'demo_yolo.py'}",
             "outputs": {}
         }
     
-    print(f"\nInput:")
-    sys.stdout.flush()  # Force flush
-    print(f"  Image: {image_path}")
-    sys.stdout.flush()
-    print(f"  Height: {height_cm} cm")
-    sys.stdout.flush()
-    print(f"  Gender: {gender}")
-    sys.stdout.flush()
-    print(f"  Output: {output_dir}")
-    sys.stdout.flush()
-    print(f"  4D-Humans dir: {four_d_humans_dir} (exists: {four_d_humans_dir.exists()})")
-    sys.stdout.flush()
+    # Single write for the whole block; step 1 flushes stdout once right before
+    # handing the terminal to the 4D-Humans subprocess
+    sys.stdout.write(
+        f"\nInput:\n"
+        f"  Image: {image_path}\n"
+        f"  Height: {height_cm} cm\n"
+        f"  Gender: {gender}\n"
+        f"  Output: {output_dir}\n"
+        f"  4D-Humans dir: {four_d_humans_dir} (exists: {four_d_humans_exists})\n"
+    )
     
     results = {
         "success": False,
@@ -926,90 +1263,102 @@ def run_pipeline(
         "outputs": {}
     }
     
-    print("\n[DEBUG] Starting Step 1...")
-    sys.stdout.flush()
-    
     try:
         # Step 1: 4D-Humans body extraction
-        print("[DEBUG] About to call step1_extract_body...")
-        sys.stdout.flush()
+        print("\n[DEBUG] Starting Step 1 (calling step1_extract_body)...")
         try:
             mesh_path, params_path = step1_extract_body(
                 image_path, output_dir, four_d_humans_dir
             )
             print(f"[DEBUG] step1_extract_body completed: mesh={mesh_path}, params={params_path}")
-            sys.stdout.flush()
         except Exception as e:
-            print(f"[DEBUG] step1_extract_body raised exception: {e}")
+            print(f"[DEBUG] step1_extract_body raised exception: {e}", flush=True)
             import traceback
             traceback.print_exc()
-            sys.stdout.flush()
             raise
         
         if not params_path:
             print("[DEBUG] params_path is None, marking Step 1 as failed")
-            sys.stdout.flush()
             results["error"] = "Step 1 failed: Body extraction"
             return results
         
-        results["outputs"]["original_mesh"] = str(mesh_path)
-        results["outputs"]["smpl_params"] = str(params_path)
-        
-        # Step 2: T-pose for measurements
-        tpose_path = output_dir / "body_tpose.obj"
-        tpose_result = step2_create_tpose(params_path, tpose_path, smpl_model_path)
-        if not tpose_result:
-            results["error"] = "Step 2 failed: T-pose generation"
-            return results
+        # Step 1 downloads any missing models, so earlier misses are stale
+        _clear_negcache()
         
-        results["outputs"]["tpose_mesh"] = str(tpose_path)
+        results["outputs"]["original_mesh"] = os.fspath(mesh_path)
+        results["outputs"]["smpl_params"] = os.fspath(params_path)
         
-        # Step 3: Extract measurements
-        measurements = step3_extract_measurements(
-            params_path, height_cm, gender, measurements_dir
-        )
-        if not measurements:
-            print("  [WARNING] Measurement extraction failed, using defaults")
-            measurements = {
-                "height": height_cm,
-                "chest circumference": height_cm * 0.53,
-                "waist circumference": height_cm * 0.43,
-                "hip circumference": height_cm * 0.50,
-                "inside leg height": height_cm * 0.45,
-            }
-        
-        measurements_path = output_dir / "measurements.json"
-        save_measurements_json(measurements, measurements_path, height_cm, gender)
-        results["outputs"]["measurements"] = str(measurements_path)
-        results["measurements"] = measurements
-        
-        # Step 4: A-pose for visualization
-        apose_path = output_dir / "body_apose.obj"
-        apose_result = step4_create_apose(params_path, apose_path, smpl_model_path)
-        if not apose_result:
-            results["error"] = "Step 4 failed: A-pose generation"
+        # Read the shape coefficients once and hand them to steps 2/4 and 3
+        betas = load_betas(params_path)
+        if betas is None:
+            results["error"] = "Step 1 failed: no betas/shape in SMPL params"
             return results
         
-        results["outputs"]["apose_mesh"] = str(apose_path)
+        # Step 5 only needs the input photo, so it runs on a worker thread
+        # (OpenCV releases the GIL) while steps 2-4 run SMPL/measurements
+        # here. Log output from the two may interleave.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # Step 5: Extract skin from body image
+            skin_future = executor.submit(step5_extract_skin, image_path, output_dir)
+            
+            # Steps 2 + 4: T-pose (measurements) and A-pose (visualization) in one
+            # batched SMPL pass (T-pose OBJ only written for debugging)
+            tpose_path = out.tpose if save_debug_meshes else None
+            apose_path = out.apose
+            poses_result = step2_4_create_poses(
+                params_path, tpose_path, apose_path, smpl_model_path, betas=betas
+            )
+            if not poses_result:
+                results["error"] = "Step 2/4 failed: T-pose/A-pose generation"
+                return results
+            
+            _, _, tpose_vertices, tpose_joints, apose_vertices, smpl_faces = poses_result
+            if tpose_path is not None:
+                results["outputs"]["tpose_mesh"] = os.fspath(tpose_path)
+            results["outputs"]["apose_mesh"] = os.fspath(apose_path)
+            
+            # Step 3: Extract measurements
+            measurements = step3_extract_measurements(
+                params_path, height_cm, gender, measurements_dir,
+                tpose_vertices=tpose_vertices, tpose_joints=tpose_joints,
+                betas=betas
+            )
+            if not measurements:
+                print("  [WARNING] Measurement extraction failed, using defaults")
+                measurements = {
+                    "height": height_cm,
+                    "chest circumference": height_cm * 0.53,
+                    "waist circumference": height_cm * 0.43,
+                    "hip circumference": height_cm * 0.50,
+                    "inside leg height": height_cm * 0.45,
+                }
+            
+            measurements_path = out.measurements
+            save_measurements_json(measurements, measurements_path, height_cm, gender)
+            results["outputs"]["measurements"] = os.fspath(measurements_path)
+            results["measurements"] = measurements
+            
+            skin_result = skin_future.result()
         
-        # Step 5: Extract skin from body image
-        skin_result = step5_extract_skin(image_path, output_dir)
         if not skin_result:
             print("  [WARNING] Skin extraction failed, using default color")
-            skin_color = np.array([180, 140, 120], dtype=np.uint8)  # Default skin tone
+            skin_color = _default_skin_color()
         else:
             _, skin_color = skin_result
         
-        results["outputs"]["skin_texture"] = str(output_dir / "skin_texture.png")
+        results["outputs"]["skin_texture"] = os.fspath(out.skin_texture)
         
         # Step 6: Create textured GLB
-        glb_path = output_dir / "avatar_textured.glb"
-        glb_result = step6_create_textured_glb(apose_path, skin_color, glb_path)
+        glb_path = out.glb
+        glb_result = step6_create_textured_glb(
+            apose_path, skin_color, glb_path, verify=False,
+            vertices=apose_vertices, faces=smpl_faces
+        )
         if not glb_result:
             results["error"] = "Step 6 failed: GLB export"
             return results
         
-        results["outputs"]["avatar_glb"] = str(glb_path)
+        results["outputs"]["avatar_glb"] = os.fspath(glb_path)
         
         # Success!
         results["success"] = True
@@ -1019,7 +1368,7 @@ def run_pipeline(
         print("="*60)
         print(f"\nOutput files in: {output_dir}")
         for name, path in results["outputs"].items():
-            print(f"  {name}: {Path(path).name}")
+            print(f"  {name}: {os.path.basename(path)}")
         
         return results
         
@@ -1067,6 +1416,11 @@ Examples:
         default='./output/avatar',
         help='Output directory (default: ./output/avatar)'
     )
+    parser.add_argument(
+        '--save-debug-meshes',
+        action='store_true',
+        help='Also save the T-pose OBJ used for measurements'
+    )
     
     args = parser.parse_args()
     
@@ -1079,12 +1433,16 @@ Examples:
     if args.height < 100 or args.height > 250:
         print(f"Warning: Unusual height value: {args.height} cm")
     
+    # After validation: it imports torch, which bad input shouldn't pay for
+    limit_torch_threads()
+    
     # Run pipeline
     results = run_pipeline(
         image_path=args.image,
         height_cm=args.height,
         gender=args.gender,
-        output_dir=args.output
+        output_dir=args.output,
+        save_debug_meshes=args.save_debug_meshes
     )
     
     if not results["success"]:
@@ -1092,22 +1450,10 @@ Examples:
         sys.exit(1)
     
     # Output results as JSON for programmatic use
-    # Convert numpy types to Python types for JSON serialization
-    def convert_numpy(obj):
-        if isinstance(obj, dict):
-            return {k: convert_numpy(v) for k, v in obj.items()}
-        elif isinstance(obj, (list, tuple)):
-            return [convert_numpy(v) for v in obj]
-        elif isinstance(obj, (np.floating, np.float32, np.float64)):
-            return float(obj)
-        elif isinstance(obj, (np.integer, np.int32, np.int64)):
-            return int(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return obj
-    
+    # (streamed to stdout; numpy values are converted as they are reached)
     print(f"\n--- RESULTS JSON ---")
-    print(json.dumps(convert_numpy(results), indent=2))
+    json.dump(results, sys.stdout, indent=2, default=_np_default)
+    sys.stdout.write("\n")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,114 @@
+"""
+Tests for the RunPod handler's output collection and presigned uploads.
+
+The pipeline itself (4D-Humans, GPU) is replaced by a fake run_pipeline
+that writes small output files, so this runs anywhere:
+
+    cd avatar-creation/pipelines && python -m unittest test_handler
+"""
+import sys
+import types
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.resolve()))
+
+import handler
+
+
+def fake_run_pipeline(image_path, height_cm, gender, output_dir):
+    """Stand-in for run_avatar_pipeline.run_pipeline: writes tiny outputs"""
+    output_dir = Path(output_dir)
+    glb = output_dir / "avatar_textured.glb"
+    glb.write_bytes(b"glTF" + b"\0" * 64)
+    measurements = output_dir / "measurements.json"
+    measurements.write_text('{"chest circumference": 100.0}')
+    return {
+        "success": True,
+        "outputs": {"avatar_glb": str(glb), "measurements": str(measurements)},
+        "measurements": {"chest circumference": 100.0},
+    }
+
+
+class HandlerUploadTest(unittest.TestCase):
+
+    def setUp(self):
+        # Fake pipeline module for the handler's lazy import
+        pipeline = types.ModuleType("run_avatar_pipeline")
+        pipeline.run_pipeline = fake_run_pipeline
+        pipeline.limit_torch_threads = lambda: None
+        patcher = mock.patch.dict(sys.modules, {"run_avatar_pipeline": pipeline})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # No real HTTP session; upload_file is mocked per test
+        patcher = mock.patch.object(handler, "upload_session", return_value=mock.MagicMock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        photo = tempfile.NamedTemporaryFile(suffix=".jpg", delete=False)
+        photo.write(b"\xff\xd8\xff")
+        photo.close()
+        self.addCleanup(Path(photo.name).unlink)
+        self.photo_url = f"file://{photo.name}"
+
+    def _event(self, upload_urls=None):
+        job_input = {
+            "photo_url": self.photo_url,
+            "height": 175,
+            "gender": "male",
+            "user_id": "test-user",
+        }
+        if upload_urls is not None:
+            job_input["upload_urls"] = upload_urls
+        return {"input": job_input}
+
+    def _targets(self, *file_keys):
+        return {
+            file_key: {
+                "upload_url": f"https://storage.test/upload/{file_key}",
+                "public_url": f"https://storage.test/public/{file_key}",
+                "content_type": "application/octet-stream",
+            }
+            for file_key in file_keys
+        }
+
+    def test_with_upload_urls_returns_urls_and_measurements(self):
+        targets = self._targets("avatar_glb", "measurements")
+        with mock.patch.object(handler, "upload_file", return_value=True) as upload:
+            result = handler.handler(self._event(targets))
+
+        self.assertNotIn("error", result)
+        self.assertEqual(upload.call_count, 2)
+        self.assertEqual(result["file_urls"], {
+            "avatar_glb": "https://storage.test/public/avatar_glb",
+            "measurements": "https://storage.test/public/measurements",
+        })
+        self.assertEqual(result["files_base64"], {})
+        self.assertEqual(result["failed_uploads"], [])
+        self.assertEqual(result["measurements"]["chest"], 100.0)
+        self.assertEqual(result["measurements"]["height"], 175.0)
+
+    def test_failed_glb_upload_falls_back_to_base64(self):
+        targets = self._targets("avatar_glb", "measurements")
+        with mock.patch.object(handler, "upload_file", return_value=False):
+            result = handler.handler(self._event(targets))
+
+        self.assertNotIn("error", result)
+        self.assertEqual(result["file_urls"], {})
+        self.assertEqual(list(result["files_base64"]), ["avatar_glb"])
+        self.assertEqual(result["failed_uploads"], ["measurements"])
+
+    def test_without_upload_urls_returns_base64(self):
+        with mock.patch.object(handler, "upload_file") as upload:
+            result = handler.handler(self._event())
+
+        self.assertNotIn("error", result)
+        upload.assert_not_called()
+        self.assertEqual(sorted(result["files_base64"]), ["avatar_glb", "measurements"])
+
+
+if __name__ == "__main__":
+    unittest.main()
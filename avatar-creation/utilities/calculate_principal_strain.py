@@ -3,8 +3,70 @@ Calculate principal strain (ARCSim-aligned method) for stress calculation.
 Based on ChatGPT's mathematical framework.
 """
 
+import math
+
 import numpy as np
 
+# Numba is optional: if installed, the per-triangle strain is computed by a
+# compiled parallel loop, otherwise by the vectorized NumPy version below.
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _principal_strain_kernel(original_vertices, deformed_vertices, faces):
+        """Numba version of calculate_principal_strain_per_triangle (same math)."""
+        n_faces = faces.shape[0]
+        principal_strains = np.zeros(n_faces)
+        
+        for i in prange(n_faces):
+            a, b, c = faces[i, 0], faces[i, 1], faces[i, 2]
+            
+            # Edge vectors in original (rest) state
+            e1ox = original_vertices[b, 0] - original_vertices[a, 0]
+            e1oy = original_vertices[b, 1] - original_vertices[a, 1]
+            e1oz = original_vertices[b, 2] - original_vertices[a, 2]
+            e2ox = original_vertices[c, 0] - original_vertices[a, 0]
+            e2oy = original_vertices[c, 1] - original_vertices[a, 1]
+            e2oz = original_vertices[c, 2] - original_vertices[a, 2]
+            
+            # Edge vectors in deformed state
+            e1dx = deformed_vertices[b, 0] - deformed_vertices[a, 0]
+            e1dy = deformed_vertices[b, 1] - deformed_vertices[a, 1]
+            e1dz = deformed_vertices[b, 2] - deformed_vertices[a, 2]
+            e2dx = deformed_vertices[c, 0] - deformed_vertices[a, 0]
+            e2dy = deformed_vertices[c, 1] - deformed_vertices[a, 1]
+            e2dz = deformed_vertices[c, 2] - deformed_vertices[a, 2]
+            
+            # Triangle areas from the cross products
+            cx = e1oy * e2oz - e1oz * e2oy
+            cy = e1oz * e2ox - e1ox * e2oz
+            cz = e1ox * e2oy - e1oy * e2ox
+            area_orig = 0.5 * math.sqrt(cx * cx + cy * cy + cz * cz)
+            cx = e1dy * e2dz - e1dz * e2dy
+            cy = e1dz * e2dx - e1dx * e2dz
+            cz = e1dx * e2dy - e1dy * e2dx
+            area_def = 0.5 * math.sqrt(cx * cx + cy * cy + cz * cz)
+            
+            len_e1_orig = math.sqrt(e1ox * e1ox + e1oy * e1oy + e1oz * e1oz)
+            len_e2_orig = math.sqrt(e2ox * e2ox + e2oy * e2oy + e2oz * e2oz)
+            len_e1_def = math.sqrt(e1dx * e1dx + e1dy * e1dy + e1dz * e1dz)
+            len_e2_def = math.sqrt(e2dx * e2dx + e2dy * e2dy + e2dz * e2dz)
+            
+            if area_orig > 1e-10 and len_e1_orig > 1e-10 and len_e2_orig > 1e-10:
+                area_strain = (area_def - area_orig) / area_orig
+                strain_e1 = (len_e1_def - len_e1_orig) / len_e1_orig
+                strain_e2 = (len_e2_def - len_e2_orig) / len_e2_orig
+                epsilon_max = max(strain_e1, strain_e2, area_strain)
+                principal_strains[i] = max(0.0, epsilon_max)
+        
+        return principal_strains
+
+
 def calculate_principal_strain_per_triangle(original_vertices, deformed_vertices, faces):
     """
     Calculate principal strain for each triangle using ARCSim method.
@@ -24,52 +86,60 @@ def calculate_principal_strain_per_triangle(original_vertices, deformed_vertices
     Returns:
         principal_strains: (m,) - maximum principal tensile strain per triangle
     """
+    if NUMBA_AVAILABLE:
+        return _principal_strain_kernel(
+            np.ascontiguousarray(original_vertices, dtype=np.float64),
+            np.ascontiguousarray(deformed_vertices, dtype=np.float64),
+            np.ascontiguousarray(faces, dtype=np.int64)
+        )
+    
+    faces = np.asarray(faces)
     n_faces = len(faces)
-    principal_strains = np.zeros(n_faces)
     
-    for i, face in enumerate(faces):
-        v0_orig, v1_orig, v2_orig = original_vertices[face]
-        v0_def, v1_def, v2_def = deformed_vertices[face]
-        
-        # Compute edge vectors in original (rest) state
-        e1_orig = v1_orig - v0_orig
-        e2_orig = v2_orig - v0_orig
-        
-        # Compute edge vectors in deformed state
-        e1_def = v1_def - v0_def
-        e2_def = v2_def - v0_def
-        
-        # For 2D material coordinates, assume triangle lies in plane
-        # Create 2D basis from original triangle
-        # This is simplified - full ARCSim uses proper material coordinates
-        
-        # Compute triangle area (for normalization)
-        area_orig = 0.5 * np.linalg.norm(np.cross(e1_orig, e2_orig))
-        area_def = 0.5 * np.linalg.norm(np.cross(e1_def, e2_def))
-        
-        if area_orig > 1e-10:
-            # Area strain (simplified proxy for principal strain)
-            area_strain = (area_def - area_orig) / area_orig
-            
-            # For principal strain approximation:
-            # Use maximum edge stretch as proxy for ε_max
-            len_e1_orig = np.linalg.norm(e1_orig)
-            len_e2_orig = np.linalg.norm(e2_orig)
-            len_e1_def = np.linalg.norm(e1_def)
-            len_e2_def = np.linalg.norm(e2_def)
-            
-            if len_e1_orig > 1e-10 and len_e2_orig > 1e-10:
-                strain_e1 = (len_e1_def - len_e1_orig) / len_e1_orig
-                strain_e2 = (len_e2_def - len_e2_orig) / len_e2_orig
-                
-                # Maximum principal strain (approximation)
-                # ε_max ≈ max(strain_e1, strain_e2, area_strain)
-                epsilon_max = max(strain_e1, strain_e2, area_strain)
-                
-                # Only tensile strain contributes: ε_max⁺ = max(0, ε_max)
-                epsilon_max_plus = max(0, epsilon_max)
-                
-                principal_strains[i] = epsilon_max_plus
+    # Gather triangle corners for all faces at once: (m, 3, 3)
+    tri_orig = np.asarray(original_vertices)[faces]
+    tri_def = np.asarray(deformed_vertices)[faces]
+    
+    # Compute edge vectors in original (rest) state
+    e1_orig = tri_orig[:, 1] - tri_orig[:, 0]
+    e2_orig = tri_orig[:, 2] - tri_orig[:, 0]
+    
+    # Compute edge vectors in deformed state
+    e1_def = tri_def[:, 1] - tri_def[:, 0]
+    e2_def = tri_def[:, 2] - tri_def[:, 0]
+    
+    # For 2D material coordinates, assume triangle lies in plane
+    # Create 2D basis from original triangle
+    # This is simplified - full ARCSim uses proper material coordinates
+    
+    # Compute triangle area (for normalization)
+    area_orig = 0.5 * np.linalg.norm(np.cross(e1_orig, e2_orig), axis=1)
+    area_def = 0.5 * np.linalg.norm(np.cross(e1_def, e2_def), axis=1)
+    
+    # For principal strain approximation:
+    # Use maximum edge stretch as proxy for ε_max
+    len_e1_orig = np.linalg.norm(e1_orig, axis=1)
+    len_e2_orig = np.linalg.norm(e2_orig, axis=1)
+    len_e1_def = np.linalg.norm(e1_def, axis=1)
+    len_e2_def = np.linalg.norm(e2_def, axis=1)
+    
+    # Degenerate triangles (zero area or zero-length edge) keep zero strain
+    valid = (area_orig > 1e-10) & (len_e1_orig > 1e-10) & (len_e2_orig > 1e-10)
+    
+    # Area strain (simplified proxy for principal strain)
+    area_strain = np.divide(area_def - area_orig, area_orig,
+                            out=np.zeros(n_faces), where=valid)
+    strain_e1 = np.divide(len_e1_def - len_e1_orig, len_e1_orig,
+                          out=np.zeros(n_faces), where=valid)
+    strain_e2 = np.divide(len_e2_def - len_e2_orig, len_e2_orig,
+                          out=np.zeros(n_faces), where=valid)
+    
+    # Maximum principal strain (approximation)
+    # ε_max ≈ max(strain_e1, strain_e2, area_strain)
+    epsilon_max = np.maximum(np.maximum(strain_e1, strain_e2), area_strain)
+    
+    # Only tensile strain contributes: ε_max⁺ = max(0, ε_max)
+    principal_strains = np.where(valid, np.clip(epsilon_max, 0, None), 0.0)
     
     return principal_strains
 
@@ -99,20 +169,18 @@ def calculate_vertex_stress_from_principal_strain(original_vertices, deformed_ve
     )
     
     # Average strain per vertex (from connected triangles)
+    # (scatter-add each face's strain onto its three vertices in one pass)
     n_vertices = len(original_vertices)
-    vertex_strain = np.zeros(n_vertices)
-    vertex_count = np.zeros(n_vertices)
-    
-    for i, face in enumerate(faces):
-        strain = triangle_strains[i]
-        for v_idx in face:
-            vertex_strain[v_idx] += strain
-            vertex_count[v_idx] += 1
+    flat_faces = np.asarray(faces).ravel()
+    vertex_strain = np.bincount(flat_faces,
+                                weights=np.repeat(triangle_strains, 3),
+                                minlength=n_vertices)
+    vertex_count = np.bincount(flat_faces, minlength=n_vertices)
     
     # Average
-    vertex_strain = np.where(vertex_count > 0, 
-                            vertex_strain / vertex_count, 
-                            0)
+    vertex_strain = np.divide(vertex_strain, vertex_count,
+                              out=np.zeros(n_vertices),
+                              where=vertex_count > 0)
     
     # Convert to stress: σ_eff = E_eff · max(0, ε_max)
     # Only tensile strain contributes
@@ -5,43 +5,197 @@ Uses existing distance files if available, or generates new ones.
 """
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import numpy as np
 
 PROJECT_ROOT = Path(__file__).parent
 HEATMAP_DIR = PROJECT_ROOT / 'output' / 'heatmaps'
 
-def load_distance_stats(filepath):
-    """Load distance statistics from text file."""
-    stats = {}
-    distances = []
+STAT_KEYS = ['min', 'max', 'mean', 'median', 'std']
+
+
+def _binary_paths(filepath):
+    """Binary sidecars for a *_distances.txt file: (*_distances.npy, *_stats.json)."""
+    filepath = Path(filepath)
+    npy_path = filepath.with_suffix('.npy')
+    stem = filepath.stem
+    if stem.endswith('_distances'):
+        stem = stem[:-len('_distances')]
+    return npy_path, filepath.with_name(f'{stem}_stats.json')
+
+
+def _has_binary(filepath):
+    """True if both sidecars exist and are not older than the text file."""
+    npy_path, stats_path = _binary_paths(filepath)
+    if not (npy_path.exists() and stats_path.exists()):
+        return False
+    filepath = Path(filepath)
+    if filepath.exists():
+        text_mtime = filepath.stat().st_mtime
+        return min(npy_path.stat().st_mtime, stats_path.stat().st_mtime) >= text_mtime
+    return True
+
+
+def save_distance_stats(filepath, distances, stats=None):
+    """
+    Write distances as <name>_distances.npy (float32) plus <name>_stats.json.
+
+    filepath is the *_distances.txt path the binary files sit next to.
+    Stats are computed from the distances when not given.
+    """
+    import json
     
+    distances = np.asarray(distances, dtype=np.float32)
+    if stats is None:
+        stats = {
+            'min': float(distances.min()),
+            'max': float(distances.max()),
+            'mean': float(distances.mean()),
+            'median': float(np.median(distances)),
+            'std': float(distances.std()),
+        }
+    npy_path, stats_path = _binary_paths(filepath)
+    np.save(npy_path, distances)
+    with open(stats_path, 'w') as f:
+        json.dump(stats, f, indent=2)
+
+
+def _parse_distance_lines(filepath, header_lines):
+    """
+    Tolerant parser for the "index: value" block after the header: counts
+    the candidate lines first, then fills a preallocated float32 array.
+    """
     with open(filepath, 'r') as f:
-        lines = f.readlines()
-    
-    # Parse statistics
-    for line in lines:
-        if ':' in line:
-            key, value = line.split(':', 1)
-            key = key.strip().lower()
-            value = value.strip()
-            if key in ['min', 'max', 'mean', 'median', 'std']:
-                stats[key] = float(value)
-    
-    # Parse per-vertex distances
-    in_distances = False
-    for line in lines:
-        if 'Per-vertex distances' in line:
-            in_distances = True
-            continue
-        if in_distances and ':' in line:
+        n = sum(1 for i, line in enumerate(f) if i >= header_lines and ':' in line)
+    
+    distances = np.empty(n, dtype=np.float32)
+    count = 0
+    with open(filepath, 'r') as f:
+        for i, line in enumerate(f):
+            if i < header_lines or ':' not in line:
+                continue
             try:
-                _, dist_str = line.split(':', 1)
-                distances.append(float(dist_str.strip()))
-            except:
+                distances[count] = float(line.split(':', 1)[1])
+                count += 1
+            except ValueError:
                 pass
+    return distances[:count]
+
+
+def load_distance_stats(filepath):
+    """
+    Load distance statistics and per-vertex distances.
+
+    Reads the binary .npy/.json sidecars when present (one contiguous read,
+    memory-mapped). Otherwise parses the text file and writes the sidecars
+    so the next run can skip the parse.
+    """
+    import json
+    
+    if _has_binary(filepath):
+        npy_path, stats_path = _binary_paths(filepath)
+        with open(stats_path, 'r') as f:
+            stats = json.load(f)
+        return stats, np.load(npy_path, mmap_mode='r')
     
-    return stats, np.array(distances)
+    # Stats lines come before the "Per-vertex distances" header, every
+    # "index: value" line after it is a distance
+    stats = {}
+    header_lines = None
+    with open(filepath, 'r') as f:
+        for i, line in enumerate(f):
+            if 'Per-vertex distances' in line:
+                header_lines = i + 1
+                break
+            if ':' in line:
+                key, value = line.split(':', 1)
+                key = key.strip().lower()
+                if key in STAT_KEYS:
+                    stats[key] = float(value.strip())
+    
+    if header_lines is None:
+        distances = np.empty(0, dtype=np.float32)
+    else:
+        try:
+            # The distance block parsed in C straight into a float32 array
+            distances = np.loadtxt(filepath, delimiter=':', usecols=1, skiprows=header_lines,
+                                   dtype=np.float32, ndmin=1)
+        except ValueError:
+            # Stray non-numeric lines: parse by hand, skipping them
+            distances = _parse_distance_lines(filepath, header_lines)
+    
+    try:
+        save_distance_stats(filepath, distances, stats)
+    except OSError as e:
+        print(f"   (could not cache binary distances: {e})")
+    
+    return stats, distances
+
+
+# Fit categories: [lo, hi) in mm, the last one capped at 1000mm (see CATEGORY_EDGES)
+CATEGORY_NAMES = [
+    'Very Tight (0-2mm)',
+    'Tight (2-5mm)',
+    'Snug (5-10mm)',
+    'Comfortable (10-15mm)',
+    'Loose (15-25mm)',
+    'Very Loose (25+mm)',
+]
+# Every category is [lo, hi), as in the original mask comparisons; the
+# last one is [25, 1000) so inf/sentinel distances aren't counted
+CATEGORY_EDGES = np.array([0, 2, 5, 10, 15, 25, 1000])
+TIGHT_THRESHOLD_MM = 10.0
+
+
+def summarize_distances(stats, distances):
+    """
+    Derive the category counts and tight count the report needs.
+
+    When the stats are complete (always the case with the binary sidecars)
+    the distances, usually a read-only memmap, are only scanned
+    sequentially: np.histogram for the categories and one comparison for
+    the tight count, so nothing is copied into RAM. Otherwise the
+    distances are sorted once, the missing stats are filled in from the
+    sorted array and the counts are binary searches into it ('sorted' is
+    None on the streaming path).
+    """
+    if all(key in stats for key in ('min', 'max', 'median')):
+        counts = np.histogram(distances, bins=CATEGORY_EDGES)[0]
+        # np.histogram closes its last bin; drop values equal to the top
+        # edge so both paths count [lo, hi)
+        counts[-1] -= np.count_nonzero(distances == CATEGORY_EDGES[-1])
+        return {
+            'sorted': None,
+            'category_counts': counts,
+            'tight_count': int(np.count_nonzero(distances < TIGHT_THRESHOLD_MM)),
+        }
+    
+    sorted_d = np.sort(distances)
+    if len(sorted_d):
+        stats.setdefault('min', float(sorted_d[0]))
+        stats.setdefault('max', float(sorted_d[-1]))
+        stats.setdefault('median', float(np.median(sorted_d)))
+    return {
+        'sorted': sorted_d,
+        'category_counts': np.diff(np.searchsorted(sorted_d, CATEGORY_EDGES)),
+        'tight_count': int(np.searchsorted(sorted_d, TIGHT_THRESHOLD_MM)),
+    }
+
+
+def _distance_file(size):
+    return HEATMAP_DIR / f'playboy_tshirt_{size}_perfect_distances.txt'
+
+
+def _process(size):
+    """Load and summarize one size; None if its distance file is missing."""
+    dist_file = _distance_file(size)
+    if not (dist_file.exists() or _has_binary(dist_file)):
+        return None
+    stats, distances = load_distance_stats(dist_file)
+    data = {'stats': stats, 'distances': distances}
+    data.update(summarize_distances(stats, distances))
+    return data
 
 
 def compare_sizes():
@@ -51,19 +205,19 @@ def compare_sizes():
     print("=" * 70)
     
     sizes = ['xs', 'm', 'xl']
-    size_data = {}
     
-    # Load data for each size
+    # Load data for each size: the sizes are independent and the heavy
+    # parts (loadtxt, sort, histogram) are numpy calls that release the GIL
+    with ThreadPoolExecutor(max_workers=len(sizes)) as executor:
+        size_data = dict(zip(sizes, executor.map(_process, sizes)))
+    
     for size in sizes:
-        dist_file = HEATMAP_DIR / f'playboy_tshirt_{size}_perfect_distances.txt'
-        if dist_file.exists():
-            stats, distances = load_distance_stats(dist_file)
-            size_data[size] = {'stats': stats, 'distances': distances}
-            print(f"\n✓ Loaded {size.upper()} data: {len(distances)} vertices")
+        dist_file = _distance_file(size)
+        if size_data[size] is not None:
+            print(f"\n✓ Loaded {size.upper()} data: {len(size_data[size]['distances'])} vertices")
         else:
             print(f"\n⚠️  {size.upper()} distance file not found: {dist_file}")
             print(f"   Run: python generate_heatmap.py --garment output/playboy_tshirt_all_sizes/playboy_tshirt_{size}_perfect.ply --body output/playboy_tshirt_all_sizes/body_apose_{size}.ply --output output/heatmaps")
-            size_data[size] = None
     
     # Compare statistics
     print("\n" + "=" * 70)
@@ -73,7 +227,7 @@ def compare_sizes():
     print("-" * 70)
     
     if all(size_data.get(s) is not None for s in sizes):
-        for metric in ['min', 'max', 'mean', 'median', 'std']:
+        for metric in STAT_KEYS:
             xs_val = size_data['xs']['stats'].get(metric, 0)
             m_val = size_data['m']['stats'].get(metric, 0)
             xl_val = size_data['xl']['stats'].get(metric, 0)
@@ -87,25 +241,14 @@ def compare_sizes():
     print("=" * 70)
     
     if all(size_data.get(s) is not None for s in sizes):
-        categories = {
-            'Very Tight (0-2mm)': (0, 2),
-            'Tight (2-5mm)': (2, 5),
-            'Snug (5-10mm)': (5, 10),
-            'Comfortable (10-15mm)': (10, 15),
-            'Loose (15-25mm)': (15, 25),
-            'Very Loose (25+mm)': (25, 1000)
-        }
-        
+        # Category counts come from summarize_distances (one pass per size)
         print(f"{'Category':<25} {'XS':<12} {'M':<12} {'XL':<12}")
         print("-" * 70)
         
-        for cat_name, (min_dist, max_dist) in categories.items():
-            xs_count = np.sum((size_data['xs']['distances'] >= min_dist) & 
-                             (size_data['xs']['distances'] < max_dist))
-            m_count = np.sum((size_data['m']['distances'] >= min_dist) & 
-                            (size_data['m']['distances'] < max_dist))
-            xl_count = np.sum((size_data['xl']['distances'] >= min_dist) & 
-                             (size_data['xl']['distances'] < max_dist))
+        for i, cat_name in enumerate(CATEGORY_NAMES):
+            xs_count = size_data['xs']['category_counts'][i]
+            m_count = size_data['m']['category_counts'][i]
+            xl_count = size_data['xl']['category_counts'][i]
             
             xs_pct = xs_count / len(size_data['xs']['distances']) * 100
             m_pct = m_count / len(size_data['m']['distances']) * 100
@@ -149,10 +292,10 @@ def compare_sizes():
         else:
             print(f"   ⚠️  Unexpected: XL should be looser")
         
-        # Count tight vertices
-        xs_tight = np.sum(size_data['xs']['distances'] < 10)
-        m_tight = np.sum(size_data['m']['distances'] < 10)
-        xl_tight = np.sum(size_data['xl']['distances'] < 10)
+        # Count tight vertices (< 10mm), precomputed by summarize_distances
+        xs_tight = size_data['xs']['tight_count']
+        m_tight = size_data['m']['tight_count']
+        xl_tight = size_data['xl']['tight_count']
         
         print(f"\n4. Tight Areas (<10mm):")
         print(f"   XS: {xs_tight} vertices ({xs_tight/len(size_data['xs']['distances'])*100:.1f}%)")
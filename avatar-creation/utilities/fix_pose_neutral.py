@@ -30,6 +30,8 @@ if not hasattr(np, 'unicode'):
 
 import torch
 import argparse
+import functools
+import os
 from pathlib import Path
 import trimesh
 
@@ -39,21 +41,38 @@ except ImportError:
     print("Error: smplx not installed. Install with: pip install smplx")
     exit(1)
 
-def fix_pose_to_apose(params_path, output_path, arm_angle_degrees=45):
+# Zero pose templates (all zeros = T-pose, upright), copied per call rather
+# than allocated from scratch
+_TEMPLATE_POSE = torch.zeros(1, 69)  # 23 joints * 3
+_TEMPLATE_ORIENT = torch.zeros(1, 3)
+
+# body_pose columns of the shoulder Z rotations (axis-angle, index 2):
+# body_pose index 15 = SMPL joint 16 (left shoulder),
+# body_pose index 16 = SMPL joint 17 (right shoulder)
+_L_SHOULDER_Z = 15*3 + 2  # 47
+_R_SHOULDER_Z = 16*3 + 2  # 50
+
+@functools.lru_cache(maxsize=4)
+def _load_smpl(models_root: str, gender: str, num_betas: int):
     """
-    Load SMPL parameters and regenerate mesh in A-pose
-    
-    Args:
-        params_path: Path to .npz file with SMPL parameters
-        output_path: Path to save the A-pose OBJ
-        arm_angle_degrees: Arm angle from vertical (default 45°)
+    Create an SMPL model, cached per (models_root, gender, num_betas).
+
+    Reading SMPL_*.pkl and building the torch buffers dominates a single
+    pose fix, so repeated calls in one process reuse the model. Returns
+    (model, faces) with faces as a contiguous int array shared by every mesh.
     """
-    print("=" * 60)
-    print("🎯 FIXING POSE TO A-POSE")
-    print("=" * 60)
-    
-    # Load parameters
-    print(f"\n📥 Loading SMPL parameters: {params_path}")
+    smpl_model = smplx.create(
+        models_root,
+        model_type='smpl',
+        gender=gender,
+        num_betas=num_betas,
+        use_face_contour=False
+    )
+    faces = np.ascontiguousarray(smpl_model.faces)
+    return smpl_model, faces
+
+def _load_betas(params_path):
+    """Load the 10 SMPL shape coefficients from a params .npz."""
     params = np.load(params_path, allow_pickle=True)
     
     # Extract betas (body shape)
@@ -62,7 +81,7 @@ def fix_pose_to_apose(params_path, output_path, arm_angle_degrees=45):
     elif 'shape' in params:
         betas = params['shape']
     else:
-        raise ValueError("No 'betas' or 'shape' found in params file")
+        raise ValueError(f"No 'betas' or 'shape' found in params file: {params_path}")
     
     # Ensure betas is the right shape
     if len(betas.shape) > 1:
@@ -71,12 +90,15 @@ def fix_pose_to_apose(params_path, output_path, arm_angle_degrees=45):
         betas = betas[:10]  # SMPL uses 10 shape parameters
     elif len(betas) < 10:
         betas = np.pad(betas, (0, 10 - len(betas)), 'constant')
-    
-    print(f"   ✓ Betas shape: {betas.shape}")
-    
-    # Find SMPL model directory compatible with smplx.create
-    # smplx expects a directory containing a `smpl` subfolder with
-    # files like `SMPL_NEUTRAL.pkl`.
+    return betas
+
+def _find_smpl_models_root():
+    """
+    Find SMPL model directory compatible with smplx.create.
+
+    smplx expects a directory containing a `smpl` subfolder with
+    files like `SMPL_NEUTRAL.pkl`.
+    """
     smpl_models_root = Path(__file__).parent / "4D-Humans-clean" / "data" / "SMPL_python_v.1.1.0"
     if not (smpl_models_root / "smpl" / "SMPL_NEUTRAL.pkl").exists():
         # Fallback: try a simpler `data/smpl` layout if present
@@ -87,64 +109,87 @@ def fix_pose_to_apose(params_path, output_path, arm_angle_degrees=45):
             raise FileNotFoundError(
                 f"SMPL_NEUTRAL.pkl not found. Expected under: {smpl_models_root}/smpl or {alt_root}/smpl"
             )
-    
-    print(f"   ✓ SMPL models root: {smpl_models_root}")
-    
-    # Create SMPL model
-    print(f"\n🔧 Creating SMPL model...")
-    smpl_model = smplx.create(
-        str(smpl_models_root),
-        model_type='smpl',
-        gender='neutral',
-        num_betas=10,
-        use_face_contour=False
-    )
-    
-    # Convert betas to torch tensor
-    betas_tensor = torch.from_numpy(betas).float().unsqueeze(0)
-    
-    # Create pose
-    # Global orientation: upright (all zeros)
-    global_orient = torch.zeros(1, 3)
-    
-    # Body pose: start with all zeros (T-pose in SMPL)
-    body_pose = torch.zeros(1, 69)  # 23 joints * 3
-    
+    return smpl_models_root
+
+def _arm_angle_rad(arm_angle_degrees):
     # CRITICAL: In SMPL, all zeros = T-pose (arms horizontal/up)
     # arm_angle_degrees: Angle from vertical (0° = straight down, 90° = horizontal)
     # To INVERT from current position (45° up) to desired position (45° down = 315°),
     # we need to NEGATE the rotation
     # Formula: arm_rotation_rad = -np.deg2rad(90 - arm_angle_degrees)
     # This inverts the direction from up to down
+    return -np.deg2rad(90 - arm_angle_degrees)  # NEGATE to invert direction (down instead of up)
+
+def _run_smpl(betas_np, arm_angle_rad):
+    """
+    Run one SMPL forward pass for a batch of body shapes in the same arm pose.
+
+    Args:
+        betas_np: (B, 10) shape coefficients
+        arm_angle_rad: Shoulder Z rotation from _arm_angle_rad()
+
+    Returns:
+        (vertices (B, 6890, 3) numpy array, faces)
+    """
+    smpl_model, faces = _load_smpl(str(_find_smpl_models_root()), 'neutral', 10)
     
-    arm_angle_rad = -np.deg2rad(90 - arm_angle_degrees)  # NEGATE to invert direction (down instead of up)
+    # Convert betas to torch tensor
+    betas_tensor = torch.from_numpy(np.asarray(betas_np, dtype=np.float32)).reshape(-1, 10)
+    batch_size = betas_tensor.shape[0]
     
-    # Set arm angles: rotate shoulders to position arms
-    # In body_pose array (69 dims = 23 joints * 3, excludes root joint):
-    # body_pose index 15 = SMPL joint 16 (left shoulder)
-    # body_pose index 16 = SMPL joint 17 (right shoulder)
-    # Rotate around Z-axis (axis-angle representation, index 2)
+    # Create pose
+    # Global orientation: upright (all zeros); only read, so a broadcast
+    # view of the template is enough
+    global_orient = _TEMPLATE_ORIENT.expand(batch_size, -1)
     
-    # Left shoulder (body_pose index 15 = SMPL joint 16): rotate Z-axis
-    body_pose[0, 15*3 + 2] = arm_angle_rad  # Negative rotation for arms down
+    # Body pose: start with all zeros (T-pose in SMPL); written below, so copy
+    body_pose = _TEMPLATE_POSE.repeat(batch_size, 1)
     
-    # Right shoulder (body_pose index 16 = SMPL joint 17): rotate Z-axis (positive for symmetry)
-    body_pose[0, 16*3 + 2] = -arm_angle_rad  # Positive rotation for arms down
+    # Set arm angles: rotate shoulders around Z to position arms
+    # Left shoulder (SMPL joint 16)
+    body_pose[:, _L_SHOULDER_Z] = arm_angle_rad  # Negative rotation for arms down
     
-    print(f"   ✓ Pose configured: arms at {arm_angle_degrees}° from vertical")
-    print(f"   ✓ Rotation: {np.rad2deg(arm_angle_rad):.1f}° from horizontal")
+    # Right shoulder (SMPL joint 17): positive for symmetry
+    body_pose[:, _R_SHOULDER_Z] = -arm_angle_rad  # Positive rotation for arms down
     
-    # Generate mesh
-    print(f"\n🔨 Generating A-pose mesh...")
-    with torch.no_grad():
+    # inference_mode also skips version counters/view tracking (cheaper than no_grad)
+    with torch.inference_mode():
         output = smpl_model(
             betas=betas_tensor,
             body_pose=body_pose,
             global_orient=global_orient
         )
     
-    vertices = output.vertices[0].cpu().numpy()
-    faces = smpl_model.faces
+    return output.vertices.cpu().numpy(), faces
+
+def fix_pose_to_apose(params_path, output_path, arm_angle_degrees=45):
+    """
+    Load SMPL parameters and regenerate mesh in A-pose
+    
+    Args:
+        params_path: Path to .npz file with SMPL parameters
+        output_path: Path to save the A-pose OBJ
+        arm_angle_degrees: Arm angle from vertical (default 45°)
+    """
+    print("=" * 60)
+    print("🎯 FIXING POSE TO A-POSE")
+    print("=" * 60)
+    
+    # Load parameters
+    print(f"\n📥 Loading SMPL parameters: {params_path}")
+    betas = _load_betas(params_path)
+    print(f"   ✓ Betas shape: {betas.shape}")
+    
+    print(f"   ✓ SMPL models root: {_find_smpl_models_root()}")
+    
+    arm_angle_rad = _arm_angle_rad(arm_angle_degrees)
+    print(f"   ✓ Pose configured: arms at {arm_angle_degrees}° from vertical")
+    print(f"   ✓ Rotation: {np.rad2deg(arm_angle_rad):.1f}° from horizontal")
+    
+    # Generate mesh (SMPL model is created on first use and cached)
+    print(f"\n🔨 Generating A-pose mesh...")
+    vertices, faces = _run_smpl(betas[None], arm_angle_rad)
+    vertices = vertices[0]
     
     print(f"   ✓ Generated: {len(vertices)} vertices, {len(faces)} faces")
     
@@ -159,13 +204,71 @@ def fix_pose_to_apose(params_path, output_path, arm_angle_degrees=45):
     
     return output_path
 
+def fix_poses_batch(params_paths, output_paths, arm_angle_degrees=45):
+    """
+    Regenerate many meshes in the same arm pose with a single SMPL forward pass
+    
+    Args:
+        params_paths: List of .npz files with SMPL parameters
+        output_paths: Output OBJ path for each params file (same order)
+        arm_angle_degrees: Arm angle from vertical (default 45°)
+    """
+    params_paths = list(params_paths)
+    output_paths = list(output_paths)
+    if len(params_paths) != len(output_paths):
+        raise ValueError("params_paths and output_paths must have the same length")
+    if not params_paths:
+        return []
+    
+    print("=" * 60)
+    print(f"🎯 FIXING POSE TO A-POSE ({len(params_paths)} meshes)")
+    print("=" * 60)
+    
+    betas = np.stack([_load_betas(p) for p in params_paths])
+    print(f"   ✓ Betas shape: {betas.shape}")
+    
+    print(f"\n🔨 Generating {len(params_paths)} meshes (arms at {arm_angle_degrees}° from vertical)...")
+    vertices, faces = _run_smpl(betas, _arm_angle_rad(arm_angle_degrees))
+    
+    for verts, output_path in zip(vertices, output_paths):
+        trimesh.Trimesh(vertices=verts, faces=faces, process=False).export(str(output_path))
+        print(f"   ✓ Saved: {output_path}")
+    
+    print("\n✅ COMPLETE!")
+    print("=" * 60)
+    
+    return output_paths
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Fix body pose to A-pose')
-    parser.add_argument('--params', type=str, required=True, help='SMPL params .npz file')
-    parser.add_argument('--output', type=str, required=True, help='Output OBJ file')
+    parser.add_argument('--params', type=str, help='SMPL params .npz file')
+    parser.add_argument('--params-glob', type=str,
+                        help='Glob of SMPL params .npz files to pose in one batch (--output is then a directory)')
+    parser.add_argument('--output', type=str, required=True, help='Output OBJ file (or directory with --params-glob)')
     parser.add_argument('--arm-angle', type=float, default=45, help='Arm angle from vertical (degrees)')
     
     args = parser.parse_args()
     
-    fix_pose_to_apose(args.params, args.output, args.arm_angle)
-
+    # The SMPL forward is CPU matmul work; use every core unless the
+    # thread count was pinned via OMP_NUM_THREADS
+    if 'OMP_NUM_THREADS' not in os.environ:
+        torch.set_num_threads(os.cpu_count() or 1)
+    
+    if args.params_glob:
+        import glob
+        params_paths = sorted(glob.glob(args.params_glob))
+        if not params_paths:
+            parser.error(f"No files match --params-glob {args.params_glob}")
+        output_dir = Path(args.output)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_paths = []
+        for params_path in params_paths:
+            stem = Path(params_path).stem
+            if stem.endswith('_params'):
+                stem = stem[:-len('_params')]
+            output_paths.append(output_dir / f"{stem}_apose.obj")
+        fix_poses_batch(params_paths, output_paths, args.arm_angle)
+    elif args.params:
+        fix_pose_to_apose(args.params, args.output, args.arm_angle)
+    else:
+        parser.error("one of --params or --params-glob is required")
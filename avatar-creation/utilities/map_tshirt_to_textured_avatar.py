@@ -9,9 +9,92 @@ import trimesh
 from pathlib import Path
 import argparse
 
+def _can_stream(meshes):
+    """Streaming only covers positions (+ vertex colors); textured meshes need trimesh."""
+    return all(getattr(m.visual, 'kind', None) != 'texture' for m in meshes)
+
+def _streaming_write_obj(output_path, meshes):
+    """
+    Write several meshes into one OBJ without building a concatenated mesh.
+
+    Vertices of each mesh are written in order and face indices are offset
+    by the vertex count of the meshes before it, which is exactly what
+    trimesh.util.concatenate would produce. Vertex colors are written
+    (as "v x y z r g b") only if every mesh has them.
+    """
+    with_colors = all(getattr(m.visual, 'kind', None) == 'vertex' for m in meshes)
+    
+    with open(output_path, 'w') as f:
+        for mesh in meshes:
+            if with_colors:
+                colors = mesh.visual.vertex_colors[:, :3] / 255.0
+                np.savetxt(f, np.hstack([mesh.vertices, colors]), fmt='v %.8g %.8g %.8g %.4f %.4f %.4f')
+            else:
+                np.savetxt(f, mesh.vertices, fmt='v %.8g %.8g %.8g')
+        
+        offset = 1  # OBJ indices are 1-based
+        for mesh in meshes:
+            np.savetxt(f, mesh.faces + offset, fmt='f %d %d %d')
+            offset += len(mesh.vertices)
+
+def _streaming_write_ply(output_path, meshes):
+    """
+    Write several meshes into one binary little-endian PLY.
+
+    Each mesh's vertices (float32, + uchar colors if every mesh has vertex
+    colors) and faces (int32 indices, offset like in _streaming_write_obj)
+    are packed into one structured array and written with tobytes(), so
+    the only conversion is the float64/int64 -> float32/int32 cast.
+    """
+    with_colors = all(getattr(m.visual, 'kind', None) == 'vertex' for m in meshes)
+    n_vertices = sum(len(m.vertices) for m in meshes)
+    n_faces = sum(len(m.faces) for m in meshes)
+    
+    vertex_dtype = [('xyz', '<f4', (3,))]
+    header = [
+        'ply',
+        'format binary_little_endian 1.0',
+        f'element vertex {n_vertices}',
+        'property float x',
+        'property float y',
+        'property float z',
+    ]
+    if with_colors:
+        vertex_dtype.append(('rgb', 'u1', (3,)))
+        header += ['property uchar red', 'property uchar green', 'property uchar blue']
+    header += [
+        f'element face {n_faces}',
+        'property list uchar int vertex_indices',
+        'end_header',
+    ]
+    face_dtype = [('count', 'u1'), ('index', '<i4', (3,))]
+    
+    with open(output_path, 'wb') as f:
+        f.write(('\n'.join(header) + '\n').encode('ascii'))
+        for mesh in meshes:
+            vertices = np.empty(len(mesh.vertices), dtype=vertex_dtype)
+            vertices['xyz'] = mesh.vertices
+            if with_colors:
+                vertices['rgb'] = mesh.visual.vertex_colors[:, :3]
+            f.write(vertices.tobytes())
+        
+        offset = 0
+        for mesh in meshes:
+            faces = np.empty(len(mesh.faces), dtype=face_dtype)
+            faces['count'] = 3
+            faces['index'] = mesh.faces + offset
+            f.write(faces.tobytes())
+            offset += len(mesh.vertices)
+
 def map_tshirt_to_avatar(garment_path, body_path, output_path):
     """
     Combine t-shirt garment with textured body avatar
+
+    Untextured meshes going to an .obj or .ply are streamed straight to the
+    file (binary PLY); anything else is concatenated with trimesh and exported.
+
+    Returns:
+        Path to the combined mesh
     """
     print("=" * 60)
     print("👕 MAPPING T-SHIRT TO TEXTURED AVATAR")
@@ -19,32 +102,54 @@ def map_tshirt_to_avatar(garment_path, body_path, output_path):
     
     # Load garment
     print(f"\n📥 Loading garment: {garment_path}")
-    garment = trimesh.load(str(garment_path))
+    # process=False skips merging/cleanup we don't need, and the garment's
+    # materials are never used. A multi-part scene contributes only its
+    # first geometry (force='mesh' would concatenate all of them).
+    garment = trimesh.load(
+        str(garment_path),
+        file_type=Path(garment_path).suffix.lstrip('.').lower(),
+        process=False,
+        skip_materials=True
+    )
     if not isinstance(garment, trimesh.Trimesh):
         garment = list(garment.geometry.values())[0]
     print(f"   ✓ Garment: {len(garment.vertices)} vertices, {len(garment.faces)} faces")
     
     # Load textured body
     print(f"\n📥 Loading textured body: {body_path}")
-    body = trimesh.load(str(body_path))
+    # Keep the body's materials: they carry the skin texture
+    body = trimesh.load(
+        str(body_path),
+        file_type=Path(body_path).suffix.lstrip('.').lower(),
+        process=False
+    )
     if not isinstance(body, trimesh.Trimesh):
         body = list(body.geometry.values())[0]
     print(f"   ✓ Body: {len(body.vertices)} vertices, {len(body.faces)} faces")
     
     # Combine meshes
     print(f"\n🔧 Combining meshes...")
-    combined = trimesh.util.concatenate([body, garment])
-    print(f"   ✓ Combined: {len(combined.vertices)} vertices, {len(combined.faces)} faces")
+    n_vertices = len(body.vertices) + len(garment.vertices)
+    n_faces = len(body.faces) + len(garment.faces)
+    print(f"   ✓ Combined: {n_vertices} vertices, {n_faces} faces")
     
     # Save combined mesh
     print(f"\n💾 Saving combined avatar with t-shirt: {output_path}")
-    combined.export(str(output_path))
+    suffix = Path(output_path).suffix.lower()
+    if suffix == '.obj' and _can_stream([body, garment]):
+        # Write body then garment directly, no combined vertex/face arrays
+        _streaming_write_obj(output_path, [body, garment])
+    elif suffix == '.ply' and _can_stream([body, garment]):
+        _streaming_write_ply(output_path, [body, garment])
+    else:
+        combined = trimesh.util.concatenate([body, garment])
+        combined.export(str(output_path))
     print(f"   ✓ Saved: {output_path}")
     
     print("\n✅ COMPLETE!")
     print("=" * 60)
     
-    return combined
+    return Path(output_path)
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Map t-shirt onto textured avatar')
@@ -2,8 +2,15 @@
 Avatar creation and retrieval endpoints
 """
 from fastapi import APIRouter, HTTPException, BackgroundTasks
-from typing import Dict, Any
-from datetime import datetime
+from typing import Dict, Any, Optional
+from datetime import datetime, timezone
+import asyncio
+import hashlib
+import hmac
+import itertools
+import logging
+import orjson
+import re
 import uuid
 
 from app.models.avatar import (
@@ -14,16 +21,49 @@ from app.models.avatar import (
     Measurements,
     ProcessingStatus,
 )
-from app.services.supabase import supabase_service
-from app.services.runpod import runpod_service
+from app.services.supabase import supabase_service, WORKER_OUTPUT_KEYS
+from app.services.runpod import runpod_service, MockRunPodService
+from app.services.job_store import job_store
 from app.config import get_settings
 
 settings = get_settings()
 
+logger = logging.getLogger("avatar")
+
 router = APIRouter()
 
-# In-memory job storage (use Redis in production)
-jobs: Dict[str, Dict[str, Any]] = {}
+# Measurements that must be in a completed fit passport (verification log)
+_CORE_MEASUREMENT_KEYS = ("chest", "waist", "hips", "inseam")
+
+# Job field claimed (atomically) by whichever of poller and webhook
+# completes a job first
+COMPLETION_CLAIM = "completing"
+
+# Public photo URL -> path inside the photos bucket (query string excluded)
+PHOTO_PATH_RE = re.compile(r"/storage/v1/object/public/photos/(?P<path>[^?#]+)")
+
+# Completion signals for jobs being polled by this worker. The RunPod
+# webhook sets the event so process_avatar_job checks the status right
+# away instead of sleeping out its backoff delay. A webhook that lands on
+# a different worker finishes the job itself (see runpod_webhook).
+_job_events: Dict[str, asyncio.Event] = {}
+
+
+def _webhook_token(job_id: str) -> str:
+    """HMAC of the job ID, so only RunPod (given the URL) can call the webhook"""
+    return hmac.new(
+        settings.runpod_webhook_secret.encode(),
+        job_id.encode(),
+        hashlib.sha256
+    ).hexdigest()
+
+
+def _webhook_url(job_id: str) -> Optional[str]:
+    """RunPod webhook URL for a job, or None if webhooks aren't configured"""
+    if not (settings.public_api_url and settings.runpod_webhook_secret):
+        return None
+    base_url = settings.public_api_url.rstrip("/")
+    return f"{base_url}/api/avatar/runpod/webhook/{job_id}?token={_webhook_token(job_id)}"
 
 
 @router.post("/create", response_model=AvatarCreateResponse)
@@ -50,25 +90,31 @@ async def create_avatar(
         progress_message="Starting avatar creation..."
     )
     
-    # Store job info
-    jobs[job_id] = {
+    # Store job info (in Redis, so any API worker can answer status polls)
+    await job_store.create(job_id, {
         "user_id": request.user_id,
+        "height": request.height,
         "status": ProcessingStatus.queued,
         "progress": 0,
         "message": "Job queued",
-        "started_at": datetime.utcnow(),
+        "started_at": datetime.now(timezone.utc),
         "runpod_job_id": None,
         "avatar_url": None,
         "measurements": None,
         "error": None,
-    }
+    })
     
     # Start background processing
-    background_tasks.add_task(
-        process_avatar_job,
-        job_id=job_id,
-        request=request
-    )
+    if settings.avatar_jobs_via_celery:
+        # Durable: queued in Redis and run by the Celery worker
+        from app.tasks.avatar_tasks import process_avatar_job_task
+        process_avatar_job_task.delay(job_id, request.model_dump(mode="json"))
+    else:
+        background_tasks.add_task(
+            process_avatar_job,
+            job_id=job_id,
+            request=request
+        )
     
     return AvatarCreateResponse(
         job_id=job_id,
@@ -79,6 +125,89 @@ async def create_avatar(
     )
 
 
+async def _submit_to_runpod(job_id: str, request: AvatarCreateRequest) -> str:
+    """
+    Sign the photo URL, presign the output uploads and submit the job to
+    RunPod; records runpod_job_id on the job and returns it
+    """
+    await job_store.update(
+        job_id,
+        status=ProcessingStatus.processing,
+        progress=10,
+        message="Preparing photo for GPU..."
+    )
+    
+    # Convert photo URL to signed URL (required for private buckets)
+    # Extract path from public URL: https://xxx.supabase.co/storage/v1/object/public/photos/user_id/file.jpg
+    # -> user_id/file.jpg (path within bucket, not including bucket name)
+    photo_url = request.photo_url
+    match = PHOTO_PATH_RE.search(photo_url)
+    if match:
+        # The path after /photos/ (this is the path within the bucket)
+        photo_path = match.group("path")
+    
+        # Create signed URL (valid for 1 hour)
+        try:
+            signed_url = supabase_service.get_photo_signed_url(photo_path, expires_in=3600)
+            if signed_url:
+                photo_url = signed_url
+                logger.debug(f"✓ Using signed URL for photo (path: {photo_path})")
+            else:
+                logger.warning(f"⚠️  Warning: Failed to create signed URL, using original: {photo_url}")
+        except Exception as e:
+            logger.warning(f"⚠️  Error creating signed URL: {e}, using original URL")
+            # Continue with original URL - might work if bucket is public
+    
+    await job_store.update(job_id, message="Submitting job to RunPod...")
+    logger.info("📤 Submitting job to RunPod...")
+    
+    # Check if using mock service
+    logger.debug(f"RunPod service type: {type(runpod_service).__name__}")
+    
+    if isinstance(runpod_service, MockRunPodService):
+        logger.warning("⚠️  WARNING: Using MOCK RunPod service - jobs will NOT be submitted to RunPod!")
+        logger.warning("⚠️  Set RUNPOD_API_KEY and RUNPOD_ENDPOINT_ID environment variables in .env file")
+        logger.warning(f"⚠️  Current values: API_KEY={'SET' if hasattr(settings, 'runpod_api_key') and settings.runpod_api_key else 'NOT SET'}")
+        logger.warning(f"⚠️  Current values: ENDPOINT_ID={'SET' if hasattr(settings, 'runpod_endpoint_id') and settings.runpod_endpoint_id else 'NOT SET'}")
+    else:
+        logger.debug("✓ Using real RunPod service")
+    
+    # Presigned upload URLs so the GPU worker can put its output files
+    # straight into storage instead of returning them base64-encoded
+    upload_urls = await supabase_service.create_presigned_uploads(
+        request.user_id, file_keys=WORKER_OUTPUT_KEYS
+    )
+    logger.debug(f"Created {len(upload_urls)} presigned upload URLs")
+    
+    # Submit to RunPod
+    runpod_job_id = await runpod_service.submit_avatar_job(
+        photo_url=photo_url,  # Use signed URL
+        height=request.height,
+        weight=request.weight,
+        gender=request.gender.value,
+        user_id=request.user_id,
+        webhook=_webhook_url(job_id),
+        upload_urls=upload_urls
+    )
+    
+    logger.debug(f"RunPod submission response: {runpod_job_id}")
+    
+    if not runpod_job_id:
+        error_msg = "Failed to submit job to RunPod - check RunPod API key and endpoint ID configuration"
+        logger.error(f"❌ {error_msg}")
+        raise Exception(error_msg)
+    
+    logger.info(f"✅ Job submitted to RunPod: {runpod_job_id}")
+    
+    await job_store.update(
+        job_id,
+        runpod_job_id=runpod_job_id,
+        progress=20,
+        message="Processing on GPU..."
+    )
+    return runpod_job_id
+
+
 async def process_avatar_job(job_id: str, request: AvatarCreateRequest):
     """
     Background task to process avatar creation
@@ -90,253 +219,333 @@ async def process_avatar_job(job_id: str, request: AvatarCreateRequest):
     4. Update database with results
     """
     try:
-        print(f"[Avatar] 🚀 Starting avatar job: {job_id}")
-        print(f"[Avatar]   User ID: {request.user_id}")
-        print(f"[Avatar]   Height: {request.height} cm")
-        print(f"[Avatar]   Gender: {request.gender.value}")
-        print(f"[Avatar]   Photo URL: {request.photo_url[:100]}...")
-        
-        jobs[job_id]["status"] = ProcessingStatus.processing
-        jobs[job_id]["progress"] = 10
-        jobs[job_id]["message"] = "Preparing photo for GPU..."
-        
-        # Convert photo URL to signed URL (required for private buckets)
-        # Extract path from public URL: https://xxx.supabase.co/storage/v1/object/public/photos/user_id/file.jpg
-        # -> user_id/file.jpg (path within bucket, not including bucket name)
-        photo_url = request.photo_url
-        if "/storage/v1/object/public/photos/" in photo_url:
-            # Extract the path after /photos/ (this is the path within the bucket)
-            path_start = photo_url.find("/photos/") + len("/photos/")
-            photo_path = photo_url[path_start:]
-            
-            # Remove query parameters if any
-            if "?" in photo_path:
-                photo_path = photo_path.split("?")[0]
-            
-            # Create signed URL (valid for 1 hour)
-            try:
-                signed_url = supabase_service.get_photo_signed_url(photo_path, expires_in=3600)
-                if signed_url:
-                    photo_url = signed_url
-                    print(f"[Avatar] ✓ Using signed URL for photo (path: {photo_path})")
-                else:
-                    print(f"[Avatar] ⚠️  Warning: Failed to create signed URL, using original: {photo_url}")
-            except Exception as e:
-                print(f"[Avatar] ⚠️  Error creating signed URL: {e}, using original URL")
-                # Continue with original URL - might work if bucket is public
+        logger.info(f"🚀 Starting avatar job: {job_id}")
+        logger.debug(f"  User ID: {request.user_id}")
+        logger.debug(f"  Height: {request.height} cm")
+        logger.debug(f"  Gender: {request.gender.value}")
+        logger.debug(f"  Photo URL: {request.photo_url[:100]}...")
         
-        jobs[job_id]["message"] = "Submitting job to RunPod..."
-        print(f"[Avatar] 📤 Submitting job to RunPod...")
+        # A redelivered Celery task (acks_late) runs this again for the
+        # same job: finished jobs are left alone and a job that already
+        # reached RunPod is polled again rather than submitted twice
+        job = await job_store.get(job_id) or {}
+        if job.get("status") in (ProcessingStatus.completed.value, ProcessingStatus.failed.value):
+            logger.info(f"Job {job_id} already {job['status']}, nothing to do")
+            return
         
-        # Check if using mock service
-        from app.services.runpod import MockRunPodService
-        service_class_name = type(runpod_service).__name__
-        print(f"[Avatar] RunPod service type: {service_class_name}")
-        
-        if service_class_name == "MockRunPodService":
-            print(f"[Avatar] ⚠️  WARNING: Using MOCK RunPod service - jobs will NOT be submitted to RunPod!")
-            print(f"[Avatar] ⚠️  Set RUNPOD_API_KEY and RUNPOD_ENDPOINT_ID environment variables in .env file")
-            print(f"[Avatar] ⚠️  Current values: API_KEY={'SET' if hasattr(settings, 'runpod_api_key') and settings.runpod_api_key else 'NOT SET'}")
-            print(f"[Avatar] ⚠️  Current values: ENDPOINT_ID={'SET' if hasattr(settings, 'runpod_endpoint_id') and settings.runpod_endpoint_id else 'NOT SET'}")
+        runpod_job_id = job.get("runpod_job_id")
+        if runpod_job_id:
+            logger.info(f"↻ Resuming job {job_id}: already submitted to RunPod as {runpod_job_id}")
         else:
-            print(f"[Avatar] ✓ Using real RunPod service")
-        
-        # Submit to RunPod
-        runpod_job_id = await runpod_service.submit_avatar_job(
-            photo_url=photo_url,  # Use signed URL
-            height=request.height,
-            weight=request.weight,
-            gender=request.gender.value,
-            user_id=request.user_id
-        )
-        
-        print(f"[Avatar] RunPod submission response: {runpod_job_id}")
+            runpod_job_id = await _submit_to_runpod(job_id, request)
         
-        if not runpod_job_id:
-            error_msg = "Failed to submit job to RunPod - check RunPod API key and endpoint ID configuration"
-            print(f"[Avatar] ❌ {error_msg}")
-            raise Exception(error_msg)
+        # Poll for completion with exponential backoff (0.5s, 1s, 2s, 4s,
+        # then every 5s). If RunPod calls our webhook, the wait ends early.
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.avatar_processing_timeout
+        completion_event = _job_events.setdefault(job_id, asyncio.Event())
         
-        print(f"[Avatar] ✅ Job submitted to RunPod: {runpod_job_id}")
-        
-        jobs[job_id]["runpod_job_id"] = runpod_job_id
-        jobs[job_id]["progress"] = 20
-        jobs[job_id]["message"] = "Processing on GPU..."
-        
-        # Poll for completion (in real scenario, use webhooks or celery)
-        import asyncio
-        max_attempts = 60  # 5 minutes with 5 second intervals
-        
-        for attempt in range(max_attempts):
-            await asyncio.sleep(5)
+        for attempt in itertools.count():
+            if loop.time() >= deadline:
+                break
+            
+            delay = min(5.0, 0.5 * (2 ** min(attempt, 4)))
+            try:
+                await asyncio.wait_for(completion_event.wait(), timeout=delay)
+                completion_event.clear()  # back to backoff if RunPod lags the webhook
+            except asyncio.TimeoutError:
+                pass
             
             status_result = await runpod_service.get_job_status(runpod_job_id)
             runpod_status = status_result.get("status", "")
             
-            # Update progress based on RunPod status
-            if runpod_status == "IN_QUEUE":
-                jobs[job_id]["progress"] = 25
-                jobs[job_id]["message"] = "Waiting in GPU queue..."
-            elif runpod_status == "IN_PROGRESS":
-                jobs[job_id]["progress"] = min(50 + attempt, 90)
-                jobs[job_id]["message"] = "Creating your 3D avatar..."
-            elif runpod_status == "COMPLETED":
-                # Success!
-                output = status_result.get("output", {})
-                measurements = output.get("measurements", {})
-                
-                print(f"[Avatar] ✓ RunPod job completed successfully")
-                print(f"[Avatar]   Measurements received: {len(measurements)} values")
-                print(f"[Avatar]   Files in output: {list(output.get('files_bytes', {}).keys())}")
-                
-                # Ensure measurements is a dict and has required fields
-                if not isinstance(measurements, dict):
-                    print(f"[Avatar] ⚠ WARNING: Measurements is not a dict: {type(measurements)}")
-                    measurements = {}
-                
-                # Ensure height is always present
-                if "height" not in measurements:
-                    measurements["height"] = float(request.height)
-                    print(f"[Avatar] Added height from request: {measurements['height']} cm")
-                
-                # Upload all pipeline files to Supabase storage
-                jobs[job_id]["progress"] = 95
-                jobs[job_id]["message"] = "Saving your avatar files..."
-                
-                files_bytes = output.get("files_bytes", {})
-                
-                # Upload all files
-                file_urls = {}
-                upload_errors = []
-                
-                if files_bytes:
-                    print(f"[Avatar] Uploading {len(files_bytes)} files to Supabase...")
-                    try:
-                        file_urls = await supabase_service.upload_pipeline_files(
-                            user_id=request.user_id,
-                            files_bytes=files_bytes
-                        )
-                        
-                        # Verify uploads
-                        print(f"[Avatar] Upload verification:")
-                        print(f"  Files to upload: {len(files_bytes)}")
-                        print(f"  Files uploaded: {len(file_urls)}")
-                        
-                        for file_key in files_bytes.keys():
-                            if file_key in file_urls:
-                                print(f"    ✓ {file_key}: {file_urls[file_key][:80]}...")
-                            else:
-                                print(f"    ✗ {file_key}: Upload failed")
-                                upload_errors.append(file_key)
-                    except Exception as upload_error:
-                        print(f"[Avatar] ✗ Upload error: {upload_error}")
-                        import traceback
-                        traceback.print_exc()
-                        # Continue anyway - try to save what we can
-                else:
-                    print(f"[Avatar] ⚠ WARNING: No files_bytes in output")
-                    print(f"[Avatar]   Output keys: {list(output.keys())}")
-                    # Fallback: try old format (single GLB)
-                    glb_bytes = output.get("avatar_glb_bytes")
-                    if glb_bytes:
-                        try:
-                            avatar_url = await supabase_service.upload_avatar(
-                                user_id=request.user_id,
-                                file_data=glb_bytes,
-                                filename="avatar_textured.glb"
-                            )
-                            file_urls["avatar_glb"] = avatar_url
-                            print(f"[Avatar] Uploaded single GLB: {avatar_url[:80]}...")
-                        except Exception as e:
-                            print(f"[Avatar] ✗ Failed to upload GLB: {e}")
-                
-                # Get main avatar URL (prioritize GLB)
-                avatar_url = file_urls.get("avatar_glb") or file_urls.get("apose_mesh") or "/models/avatar_with_tshirt_m.glb"
-                
-                if not avatar_url or avatar_url == "/models/avatar_with_tshirt_m.glb":
-                    print(f"[Avatar] ⚠ WARNING: No valid avatar URL, using fallback")
-                
-                # Update database with all file URLs stored in JSONB
-                print(f"[Avatar] Updating database with results...")
-                try:
-                    db_update_success = await supabase_service.update_fit_passport_with_results(
-                        user_id=request.user_id,
-                        avatar_url=avatar_url,
-                        measurements=measurements,
-                        pipeline_files=file_urls  # Store all URLs in JSONB field
-                    )
-                    
-                    # Verify database update and user linkage
-                    if db_update_success:
-                        print(f"[Avatar] ✓ Database updated successfully")
-                        # Verify by reading back
-                        fit_passport = await supabase_service.get_fit_passport(request.user_id)
-                        if fit_passport:
-                            print(f"[Avatar] ✓ Verification: Avatar URL in DB: {fit_passport.get('avatar_url', 'NOT SET')[:80]}...")
-                            print(f"[Avatar] ✓ Verification: Status: {fit_passport.get('status')}")
-                            print(f"[Avatar] ✓ Verification: Measurements count: {len([k for k in ['chest', 'waist', 'hips', 'inseam'] if fit_passport.get(k)])}")
-                            
-                            # Verify user linkage: Check that avatar_url contains user_id
-                            db_avatar_url = fit_passport.get('avatar_url', '')
-                            if request.user_id in db_avatar_url:
-                                print(f"[Avatar] ✓ USER LINKAGE VERIFIED: Avatar URL contains user_id '{request.user_id}'")
-                                print(f"[Avatar]   Storage path structure: avatars/{request.user_id}/avatar_textured.glb")
-                            else:
-                                print(f"[Avatar] ⚠ WARNING: Avatar URL does not contain user_id")
-                                print(f"[Avatar]   User ID: {request.user_id}")
-                                print(f"[Avatar]   Avatar URL: {db_avatar_url[:100]}...")
-                            
-                            # Verify pipeline_files linkage
-                            pipeline_files = fit_passport.get('pipeline_files', {})
-                            if pipeline_files:
-                                print(f"[Avatar] ✓ Pipeline files stored: {len(pipeline_files)} files")
-                                # Check that all file URLs contain user_id
-                                files_with_user_id = sum(1 for url in pipeline_files.values() if request.user_id in str(url))
-                                print(f"[Avatar]   Files linked to user: {files_with_user_id}/{len(pipeline_files)}")
-                                if files_with_user_id == len(pipeline_files):
-                                    print(f"[Avatar] ✓ All pipeline files correctly linked to user_id")
-                                else:
-                                    print(f"[Avatar] ⚠ Some files may not be linked correctly")
-                        else:
-                            print(f"[Avatar] ✗ Verification failed: Could not read back fit_passport")
-                    else:
-                        print(f"[Avatar] ✗ Database update failed")
-                        raise Exception("Failed to update database")
-                except Exception as db_error:
-                    print(f"[Avatar] ✗ Database update error: {db_error}")
-                    import traceback
-                    traceback.print_exc()
-                    raise
-                
-                jobs[job_id]["status"] = ProcessingStatus.completed
-                jobs[job_id]["progress"] = 100
-                jobs[job_id]["message"] = "Avatar created successfully!"
-                jobs[job_id]["avatar_url"] = avatar_url
-                jobs[job_id]["measurements"] = measurements
-                jobs[job_id]["completed_at"] = datetime.utcnow()
-                
-                print(f"[Avatar] ✓ Job {job_id} marked as completed")
-                print(f"[Avatar]   Avatar URL: {avatar_url[:80]}...")
-                print(f"[Avatar]   Measurements: {len(measurements)} values")
-                
+            # Update progress / finish based on RunPod status
+            handler = _STATUS_HANDLERS.get(runpod_status)
+            if handler is not None and await handler(job_id, request, attempt, status_result):
                 return
-                
-            elif runpod_status in ["FAILED", "CANCELLED"]:
-                raise Exception(status_result.get("error", "GPU processing failed"))
         
         # Timeout
         raise Exception("Avatar creation timed out")
         
     except Exception as e:
-        print(f"Avatar processing error: {e}")
-        jobs[job_id]["status"] = ProcessingStatus.failed
-        jobs[job_id]["error"] = str(e)
-        jobs[job_id]["message"] = "Avatar creation failed"
+        logger.error(f"Avatar processing error: {e}")
+        await job_store.update(
+            job_id,
+            status=ProcessingStatus.failed,
+            error=str(e),
+            message="Avatar creation failed"
+        )
         
         await supabase_service.update_fit_passport_status(
             user_id=request.user_id,
             status="failed"
         )
+    finally:
+        _job_events.pop(job_id, None)
+
+
+async def _log_fit_passport_verification(user_id: str):
+    """
+    Read the fit passport back and log whether the results landed, as one
+    JSON line (WARNING if something doesn't check out, DEBUG otherwise)
+    """
+    fit_passport = await supabase_service.get_fit_passport(user_id)
+    if not fit_passport:
+        logger.warning("✗ Verification failed: Could not read back fit_passport")
+        return
+    
+    db_avatar_url = fit_passport.get("avatar_url") or ""
+    pipeline_files = fit_passport.get("pipeline_files") or {}
+    # User linkage: avatar and file URLs live under avatars/{user_id}/
+    files_with_user_id = sum(1 for url in pipeline_files.values() if user_id in str(url))
+    payload = {
+        "user_id": user_id,
+        "status": fit_passport.get("status"),
+        "avatar_url_set": bool(db_avatar_url),
+        "avatar_url_linked": user_id in db_avatar_url,
+        "measurements": sum(1 for k in _CORE_MEASUREMENT_KEYS if fit_passport.get(k)),
+        "files_ok": files_with_user_id,
+        "files_total": len(pipeline_files),
+    }
+    ok = payload["avatar_url_linked"] and files_with_user_id == len(pipeline_files)
+    logger.log(
+        logging.DEBUG if ok else logging.WARNING,
+        "avatar.verify %s", orjson.dumps(payload).decode()
+    )
+
+
+async def _complete_avatar_job(job_id: str, user_id: str, height: int, status_result: Dict[str, Any]) -> bool:
+    """
+    Finish a job RunPod reported as COMPLETED: store its files, write the
+    results to the fit passport and mark the job completed
+    
+    Called by the poller and by the webhook, possibly both for one job
+    (on different workers). Only the caller that claims the job does the
+    work; if it fails the claim is released so the other can retry.
+    
+    Returns True once the job is completed (by this or the other caller),
+    False while the other caller is still completing it.
+    """
+    if not await job_store.claim(job_id, COMPLETION_CLAIM):
+        job = await job_store.get(job_id)
+        done = bool(job) and job.get("status") == ProcessingStatus.completed.value
+        logger.info(f"Job {job_id} {'already completed' if done else 'being completed elsewhere'}, skipping")
+        return done
+    
+    try:
+        await _finish_avatar_job(job_id, user_id, height, status_result)
+    except Exception:
+        await job_store.release(job_id, COMPLETION_CLAIM)
+        raise
+    return True
+
+
+async def _finish_avatar_job(job_id: str, user_id: str, height: int, status_result: Dict[str, Any]):
+    """Body of _complete_avatar_job, run by the caller holding the claim"""
+    output = status_result.get("output", {})
+    # Copy: the output may be shared with other callers of get_job_status
+    measurements = output.get("measurements", {})
+    if isinstance(measurements, dict):
+        measurements = dict(measurements)
+    
+    logger.info("✓ RunPod job completed successfully")
+    logger.debug(f"  Measurements received: {len(measurements)} values")
+    logger.debug(f"  Files uploaded by worker: {list(output.get('file_urls', {}).keys())}")
+    logger.debug(f"  Files in output: {list(output.get('files_bytes', {}).keys())}")
+    if output.get("failed_uploads"):
+        logger.warning(f"⚠ Worker could not upload: {output['failed_uploads']}")
+    
+    # Ensure measurements is a dict and has required fields
+    if not isinstance(measurements, dict):
+        logger.warning(f"⚠ WARNING: Measurements is not a dict: {type(measurements)}")
+        measurements = {}
+    
+    # Ensure height is always present
+    if "height" not in measurements:
+        measurements["height"] = float(height)
+        logger.debug(f"Added height from request: {measurements['height']} cm")
+    
+    # Upload all pipeline files to Supabase storage
+    await job_store.update(job_id, progress=95, message="Saving your avatar files...")
+    
+    files_bytes = output.get("files_bytes", {})
+    
+    # Files the worker already uploaded via presigned URLs; only
+    # the ones it returned inline still need uploading here
+    file_urls = dict(output.get("file_urls") or {})
+    upload_errors = []
+    
+    if files_bytes:
+        logger.info(f"Uploading {len(files_bytes)} files to Supabase...")
+        try:
+            file_urls.update(await supabase_service.upload_pipeline_files(
+                user_id=user_id,
+                files_bytes=files_bytes
+            ))
+            
+            # Verify uploads
+            logger.debug("Upload verification:")
+            logger.debug(f"  Files to upload: {len(files_bytes)}")
+            logger.debug(f"  Files uploaded: {len(file_urls)}")
+            
+            for file_key in files_bytes.keys():
+                if file_key in file_urls:
+                    logger.debug(f"    ✓ {file_key}: {file_urls[file_key][:80]}...")
+                else:
+                    logger.warning(f"    ✗ {file_key}: Upload failed")
+                    upload_errors.append(file_key)
+        except Exception as upload_error:
+            logger.exception(f"✗ Upload error: {upload_error}")
+            # Continue anyway - try to save what we can
+    elif not file_urls:
+        logger.warning("⚠ WARNING: No files_bytes in output")
+        logger.debug(f"  Output keys: {list(output.keys())}")
+        # Fallback: try old format (single GLB)
+        glb_bytes = output.get("avatar_glb_bytes")
+        if glb_bytes:
+            try:
+                avatar_url = await supabase_service.upload_avatar(
+                    user_id=user_id,
+                    file_data=glb_bytes,
+                    filename="avatar_textured.glb"
+                )
+                file_urls["avatar_glb"] = avatar_url
+                logger.info(f"Uploaded single GLB: {avatar_url[:80]}...")
+            except Exception as e:
+                logger.error(f"✗ Failed to upload GLB: {e}")
+    
+    # Get main avatar URL (prioritize GLB)
+    avatar_url = file_urls.get("avatar_glb") or file_urls.get("apose_mesh") or "/models/avatar_with_tshirt_m.glb"
+    
+    if not avatar_url or avatar_url == "/models/avatar_with_tshirt_m.glb":
+        logger.warning("⚠ WARNING: No valid avatar URL, using fallback")
+    
+    # Update database with all file URLs stored in JSONB
+    logger.debug("Updating database with results...")
+    try:
+        db_update_success = await supabase_service.update_fit_passport_with_results(
+            user_id=user_id,
+            avatar_url=avatar_url,
+            measurements=measurements,
+            pipeline_files=file_urls  # Store all URLs in JSONB field
+        )
+        
+        # Verify database update and user linkage
+        if db_update_success:
+            logger.info("✓ Database updated successfully")
+            # Verify by reading back (debug only: it costs an extra DB read)
+            if logger.isEnabledFor(logging.DEBUG):
+                await _log_fit_passport_verification(user_id)
+        else:
+            logger.error("✗ Database update failed")
+            raise Exception("Failed to update database")
+    except Exception as db_error:
+        logger.exception(f"✗ Database update error: {db_error}")
+        raise
+    
+    await job_store.update(
+        job_id,
+        status=ProcessingStatus.completed,
+        progress=100,
+        message="Avatar created successfully!",
+        avatar_url=avatar_url,
+        measurements=measurements,
+        completed_at=datetime.now(timezone.utc)
+    )
+    
+    logger.info(f"✓ Job {job_id} marked as completed")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("avatar.completed %s", orjson.dumps({
+            "job_id": job_id,
+            "avatar_url": avatar_url,
+            "measurements": len(measurements),
+            "files": len(file_urls),
+        }).decode())
+
+
+async def _on_in_queue(job_id: str, request: AvatarCreateRequest, attempt: int, status_result: Dict[str, Any]) -> bool:
+    await job_store.update(job_id, progress=25, message="Waiting in GPU queue...")
+    return False
+
+
+async def _on_in_progress(job_id: str, request: AvatarCreateRequest, attempt: int, status_result: Dict[str, Any]) -> bool:
+    await job_store.update(
+        job_id,
+        progress=min(50 + attempt, 90),
+        message="Creating your 3D avatar..."
+    )
+    return False
+
+
+async def _on_completed(job_id: str, request: AvatarCreateRequest, attempt: int, status_result: Dict[str, Any]) -> bool:
+    # False while the webhook completes it: keep polling in case that fails
+    return await _complete_avatar_job(job_id, request.user_id, request.height, status_result)
+
+
+async def _on_failed(job_id: str, request: AvatarCreateRequest, attempt: int, status_result: Dict[str, Any]) -> bool:
+    raise Exception(status_result.get("error", "GPU processing failed"))
+
+
+# RunPod status -> handler(job_id, request, attempt, status_result).
+# A handler returns True once the job is finished; other statuses just
+# keep polling.
+_STATUS_HANDLERS = {
+    "IN_QUEUE": _on_in_queue,
+    "IN_PROGRESS": _on_in_progress,
+    "COMPLETED": _on_completed,
+    "FAILED": _on_failed,
+    "CANCELLED": _on_failed,
+}
+
+
+async def _complete_from_webhook(job_id: str, job: Dict[str, Any]):
+    """
+    Complete a job from the webhook when no poller on this worker is
+    waiting for it. The output is fetched from RunPod (already decoded by
+    get_job_status) rather than taken from the webhook body.
+    """
+    try:
+        status_result = await runpod_service.get_job_status(job["runpod_job_id"])
+        if status_result.get("status") == "COMPLETED":
+            await _complete_avatar_job(job_id, job["user_id"], job["height"], status_result)
+    except Exception as e:
+        # The poller (wherever it runs) still finishes or fails the job
+        logger.error(f"✗ Webhook completion failed for {job_id}: {e}")
+
+
+@router.post("/runpod/webhook/{job_id}")
+async def runpod_webhook(
+    job_id: str,
+    token: str,
+    payload: Dict[str, Any],
+    background_tasks: BackgroundTasks
+):
+    """
+    RunPod completion webhook
+    
+    RunPod POSTs the final job status here when a job finishes. The URL
+    carries an HMAC token of the job ID. If this worker is polling the
+    job, the poller is woken up to finish it; otherwise a COMPLETED job
+    is finished here directly, with polling as the fallback.
+    """
+    if not settings.runpod_webhook_secret or not hmac.compare_digest(token, _webhook_token(job_id)):
+        raise HTTPException(status_code=403, detail="Invalid webhook token")
+    
+    job = await job_store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    runpod_status = payload.get("status", "")
+    logger.info(f"RunPod webhook for {job_id}: {runpod_status}")
+    
+    if runpod_status in ("COMPLETED", "FAILED", "CANCELLED"):
+        event = _job_events.get(job_id)
+        if event is not None:
+            event.set()
+        elif runpod_status == "COMPLETED" and job.get("runpod_job_id") and job.get("height"):
+            background_tasks.add_task(_complete_from_webhook, job_id, job)
+    
+    return {"received": True}
 
 
 @router.get("/status/{job_id}", response_model=AvatarStatusResponse)
@@ -346,11 +555,10 @@ async def get_avatar_status(job_id: str):
     
     Poll this endpoint to track progress
     """
-    if job_id not in jobs:
+    job = await job_store.get(job_id)
+    if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = jobs[job_id]
-    
     return AvatarStatusResponse(
         job_id=job_id,
         user_id=job["user_id"],
@@ -370,29 +578,14 @@ async def get_avatar(user_id: str):
     """
     Get user's avatar and measurements
     """
-    fit_passport = await supabase_service.get_fit_passport(user_id)
+    fit_passport = await supabase_service.get_fit_passport_cached(user_id)
     
     if not fit_passport:
         raise HTTPException(status_code=404, detail="Avatar not found")
     
-    return AvatarResponse(
-        user_id=user_id,
-        avatar_url=fit_passport.get("avatar_url"),
-        avatar_thumbnail_url=fit_passport.get("avatar_thumbnail_url"),
-        measurements=Measurements(
-            height=fit_passport.get("height", 0),
-            chest=fit_passport.get("chest"),
-            waist=fit_passport.get("waist"),
-            hips=fit_passport.get("hips"),
-            inseam=fit_passport.get("inseam"),
-            shoulder_width=fit_passport.get("shoulder_width"),
-            arm_length=fit_passport.get("arm_length"),
-            neck=fit_passport.get("neck"),
-            thigh=fit_passport.get("thigh"),
-            torso_length=fit_passport.get("torso_length"),
-        ),
-        gender=fit_passport.get("gender", "other"),
-        status=fit_passport.get("status", "pending"),
-        created_at=fit_passport.get("created_at"),
-        updated_at=fit_passport.get("updated_at"),
-    )
+    # Row columns map onto the models by name; defaults fill missing ones
+    return AvatarResponse.model_validate({
+        **fit_passport,
+        "user_id": user_id,
+        "measurements": Measurements.model_validate(fit_passport),
+    })
@@ -2,7 +2,8 @@
 Analytics event tracking endpoints
 """
 from fastapi import APIRouter, HTTPException
-from datetime import datetime
+from datetime import datetime, timezone
+import uuid
 
 from app.models.events import AnalyticsEvent, AnalyticsEventResponse
 from app.services.supabase import supabase_service
@@ -56,12 +57,13 @@ async def create_tryon_session(
     Called when user opens the try-on widget
     """
     # TODO: Implement tryon_sessions table operations
-    session_id = f"session-{datetime.utcnow().timestamp()}"
+    # Random like job IDs: timestamps collide for sessions opened together
+    session_id = f"session-{uuid.uuid4().hex[:12]}"
     
     return {
         "session_id": session_id,
         "user_id": user_id,
         "brand_id": brand_id,
         "garment_id": garment_id,
-        "started_at": datetime.utcnow().isoformat()
+        "started_at": datetime.now(timezone.utc).isoformat()
     }
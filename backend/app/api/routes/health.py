@@ -2,29 +2,65 @@
 Health check endpoints
 """
 from fastapi import APIRouter
-from datetime import datetime
+from fastapi.responses import ORJSONResponse
+from cachetools import TTLCache
+from datetime import datetime, timezone
+import asyncio
+
+from app.services.job_store import job_store
+from app.services.supabase import supabase_service
+from app.services.runpod import runpod_service
 
 router = APIRouter()
 
+# Probe results are reused for 5s so a 1 Hz readiness probe (times the
+# number of pods) doesn't turn into constant load on the dependencies
+_readiness: TTLCache = TTLCache(maxsize=1, ttl=5)
+
+# Max time for one dependency to answer before it counts as down
+PROBE_TIMEOUT_SECONDS = 3.0
+
+
+async def _probe(check) -> str:
+    try:
+        ok = await asyncio.wait_for(check(), timeout=PROBE_TIMEOUT_SECONDS)
+        return "ok" if ok else "error: unhealthy response"
+    except Exception as e:
+        return f"error: {type(e).__name__}: {e}"
+
+
+async def _check_services() -> dict:
+    names = ["database", "redis", "gpu"]
+    results = await asyncio.gather(
+        _probe(supabase_service.ping),
+        _probe(job_store.ping),
+        _probe(runpod_service.ping),
+    )
+    return dict(zip(names, results))
+
 
 @router.get("/health")
 async def health_check():
     """Basic health check"""
     return {
         "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
     }
 
 
 @router.get("/ready")
 async def readiness_check():
-    """Readiness check - verify dependencies"""
-    # TODO: Add actual checks for Supabase, Redis, etc.
-    return {
-        "status": "ready",
-        "services": {
-            "database": "connected",
-            "storage": "connected",
-            "gpu": "available"
+    """Readiness check - verify dependencies (503 if any is down)"""
+    services = _readiness.get("services")
+    if services is None:
+        services = await _check_services()
+        _readiness["services"] = services
+    
+    ready = all(result == "ok" for result in services.values())
+    return ORJSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "services": services,
         }
-    }
+    )
@@ -38,26 +38,7 @@ async def update_measurements(request: MeasurementsUpdate):
     Used when user corrects auto-generated measurements
     """
     # Build update dict with only provided values
-    measurements = {}
-    
-    if request.chest is not None:
-        measurements["chest"] = request.chest
-    if request.waist is not None:
-        measurements["waist"] = request.waist
-    if request.hips is not None:
-        measurements["hips"] = request.hips
-    if request.inseam is not None:
-        measurements["inseam"] = request.inseam
-    if request.shoulder_width is not None:
-        measurements["shoulder_width"] = request.shoulder_width
-    if request.arm_length is not None:
-        measurements["arm_length"] = request.arm_length
-    if request.neck is not None:
-        measurements["neck"] = request.neck
-    if request.thigh is not None:
-        measurements["thigh"] = request.thigh
-    if request.torso_length is not None:
-        measurements["torso_length"] = request.torso_length
+    measurements = request.model_dump(exclude_none=True, exclude={"user_id"})
     
     if not measurements:
         raise HTTPException(
@@ -87,7 +68,7 @@ async def get_measurements(user_id: str):
     """
     Get user's current measurements
     """
-    fit_passport = await supabase_service.get_fit_passport(user_id)
+    fit_passport = await supabase_service.get_fit_passport_cached(user_id)
     
     if not fit_passport:
         raise HTTPException(status_code=404, detail="User not found")
@@ -1,7 +1,7 @@
 """
 Configuration settings for TryOn Backend API
 """
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
 
 
@@ -12,17 +12,30 @@ class Settings(BaseSettings):
     app_name: str = "TryOn API"
     debug: bool = False
     api_version: str = "v1"
+    log_level: str = "INFO"  # DEBUG adds per-job details and DB read-back checks
     
     # Supabase
     supabase_url: str
     supabase_service_key: str  # Service role key for backend operations
+    # Supabase Postgres connection string for pooled hot reads (optional)
+    postgres_url: str = ""
     
-    # Redis (for Celery)
+    # Redis (Celery broker + avatar job state)
     redis_url: str = "redis://localhost:6379/0"
     
     # RunPod
     runpod_api_key: str = ""
     runpod_endpoint_id: str = ""
+    # HTTP/2 connection pool to api.runpod.ai: requests beyond these limits
+    # wait for a free connection here instead of piling onto the upstream
+    runpod_max_conn: int = 100
+    runpod_max_keepalive: int = 50
+    # Max RunPod API requests in flight per process
+    runpod_concurrency: int = 32
+    
+    # RunPod completion webhooks (both must be set to enable)
+    public_api_url: str = ""  # Externally reachable base URL of this API
+    runpod_webhook_secret: str = ""  # HMAC key for webhook URL tokens
     
     # Storage Buckets
     photos_bucket: str = "photos"
@@ -30,10 +43,16 @@ class Settings(BaseSettings):
     
     # Processing
     avatar_processing_timeout: int = 300  # 5 minutes
+    # Run avatar jobs on the Celery worker (Redis queue, survives API
+    # restarts) instead of as in-process background tasks
+    avatar_jobs_via_celery: bool = False
     
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
+    # Frozen: settings are read-only once loaded
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        frozen=True
+    )
 
 
 @lru_cache()
@@ -0,0 +1,63 @@
+"""
+Direct Postgres connection pool for hot read paths
+
+The polled GET endpoints read fit passports straight from Supabase's
+Postgres over a pooled asyncpg connection instead of a PostgREST HTTP
+request. Writes still go through the Supabase client. Without
+POSTGRES_URL no engine is created and reads stay on PostgREST.
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
+from typing import Optional, Dict, Any
+import orjson
+
+from app.config import get_settings
+
+
+settings = get_settings()
+
+# to_jsonb gives the row in the same JSON shape PostgREST returns
+# (timestamps as ISO strings, etc.), so callers can't tell the difference
+_FIT_PASSPORT_SQL = text("SELECT to_jsonb(fp) FROM fit_passports fp WHERE fp.user_id = :user_id")
+
+
+def _asyncpg_url(url: str) -> str:
+    """Supabase hands out postgres:// / postgresql:// URLs; select asyncpg"""
+    for prefix in ("postgres://", "postgresql://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+def create_engine() -> Optional[AsyncEngine]:
+    if not settings.postgres_url:
+        print("[DB] POSTGRES_URL not set - fit passport reads use PostgREST")
+        return None
+    return create_async_engine(
+        _asyncpg_url(settings.postgres_url),
+        pool_size=20,
+        max_overflow=10,
+        pool_pre_ping=True,
+        pool_timeout=30,
+    )
+
+
+async def read_fit_passport(user_id: str) -> Optional[Dict[str, Any]]:
+    """Read one fit passport over the pool (engine must be configured)"""
+    async with engine.connect() as conn:
+        result = await conn.execute(_FIT_PASSPORT_SQL, {"user_id": user_id})
+        row = result.scalar_one_or_none()
+    if row is None:
+        return None
+    # asyncpg returns jsonb as text
+    return orjson.loads(row) if isinstance(row, (str, bytes)) else row
+
+
+async def close() -> None:
+    """Dispose of the connection pool (app shutdown)"""
+    if engine is not None:
+        await engine.dispose()
+
+
+# Singleton engine (None without POSTGRES_URL)
+engine = create_engine()
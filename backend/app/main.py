@@ -1,16 +1,36 @@
 """
 TryOn Backend API - Main Application Entry Point
 """
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 
 from app.config import get_settings
 from app.api.routes import avatar, measurements, events, health
+from app.services.job_store import job_store
+from app.services.runpod import runpod_service
+from app.db import session as db
 
 
 settings = get_settings()
 
+# Log records go onto a queue and are written to stderr by a listener
+# thread, so logging from request handlers never blocks the event loop
+_log_queue = queue.SimpleQueue()
+_log_output = logging.StreamHandler()
+_log_output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+log_listener = QueueListener(_log_queue, _log_output)
+_log_input = QueueHandler(_log_queue)
+# Only the message (plus any traceback) is rendered before queueing; the
+# listener's formatter adds time/level/name
+_log_input.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(level=settings.log_level.upper(), handlers=[_log_input])
+log_listener.start()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -20,6 +40,10 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     print(f"Shutting down {settings.app_name}...")
+    await job_store.close()
+    await runpod_service.close()
+    await db.close()
+    log_listener.stop()  # flushes queued records
 
 
 # Create FastAPI app
@@ -28,6 +52,8 @@ app = FastAPI(
     description="Backend API for TryOn virtual fitting room platform",
     version=settings.api_version,
     lifespan=lifespan,
+    # orjson encodes responses (measurement dicts, status polls) in C
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
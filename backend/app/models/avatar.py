@@ -1,7 +1,7 @@
 """
 Avatar-related Pydantic models
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime
 from enum import Enum
@@ -55,7 +55,10 @@ class AvatarStatusResponse(BaseModel):
 
 class Measurements(BaseModel):
     """Body measurements in cm"""
-    height: int
+    # Built straight from fit_passports rows, which carry other columns too
+    model_config = ConfigDict(extra="ignore")
+    
+    height: int = 0
     chest: Optional[int] = None
     waist: Optional[int] = None
     hips: Optional[int] = None
@@ -69,11 +72,13 @@ class Measurements(BaseModel):
 
 class AvatarResponse(BaseModel):
     """Full avatar data response"""
+    model_config = ConfigDict(extra="ignore")
+    
     user_id: str
     avatar_url: Optional[str] = None
     avatar_thumbnail_url: Optional[str] = None
     measurements: Measurements
-    gender: Gender
-    status: ProcessingStatus
+    gender: Gender = Gender.other
+    status: ProcessingStatus = ProcessingStatus.pending
     created_at: datetime
     updated_at: datetime
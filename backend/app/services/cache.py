@@ -0,0 +1,71 @@
+"""
+Short-lived read cache for API responses
+
+Entries live in Redis (sharing the job store's connection pool) so every
+API worker sees the same cache and invalidations. When the job store fell
+back to memory (no Redis), the cache is in-process too.
+"""
+import time
+import orjson
+from cachetools import LRUCache
+from typing import Optional, Any
+
+from app.services.job_store import job_store, RedisJobStore
+
+
+class RedisCache:
+    """Key/value cache in Redis with per-entry TTL"""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Cached value, or None on a miss"""
+        raw = await self.redis.get(key)
+        return orjson.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        await self.redis.set(key, orjson.dumps(value), ex=ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.redis.delete(key)
+
+
+# In-memory cache for development without Redis
+class InMemoryCache:
+    """
+    In-process cache (single worker only) with per-entry TTL, like Redis.
+
+    Bounded to 4096 entries (least recently used dropped first); each one
+    stores its expiry time and is treated as a miss once it has passed.
+    """
+
+    def __init__(self):
+        # key -> (monotonic expiry time, value)
+        self.entries: LRUCache = LRUCache(maxsize=4096)
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            self.entries.pop(key, None)
+            return None
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        self.entries[key] = (time.monotonic() + ttl, value)
+
+    async def delete(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+
+def get_cache():
+    if isinstance(job_store, RedisJobStore):
+        return RedisCache(job_store.redis)
+    return InMemoryCache()
+
+
+# Singleton instance
+cache = get_cache()
@@ -0,0 +1,158 @@
+"""
+Avatar job state storage backed by Redis
+
+Each job is one Redis hash (job:{job_id}) with a TTL, so every API worker
+sees the same job state and finished jobs expire on their own. Without a
+reachable Redis (local dev) jobs live in a bounded in-memory cache instead.
+"""
+import asyncio
+import orjson
+import redis.asyncio as aioredis
+from cachetools import TTLCache
+from typing import Optional, Dict, Any
+
+from app.config import get_settings
+
+
+settings = get_settings()
+
+# Jobs are polled for a few minutes at most; keep them around for an hour
+JOB_TTL_SECONDS = 3600
+
+
+def _encode(fields: Dict[str, Any]) -> Dict[str, bytes]:
+    """
+    Encode hash field values as JSON so ints, None, dicts, datetimes
+    (ISO 8601) and enums (their value) round-trip through Redis.
+    """
+    return {name: orjson.dumps(value) for name, value in fields.items()}
+
+
+class RedisJobStore:
+    """Service for avatar job state in Redis"""
+
+    def __init__(self):
+        self.redis = aioredis.from_url(settings.redis_url)
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"job:{job_id}"
+
+    async def create(self, job_id: str, data: Dict[str, Any]) -> None:
+        """Store a new job"""
+        await self.update(job_id, **data)
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        """Set some fields of a job and refresh its TTL"""
+        key = self._key(job_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=_encode(fields))
+            pipe.expire(key, JOB_TTL_SECONDS)
+            await pipe.execute()
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get all fields of a job, or None if it doesn't exist (or expired)"""
+        raw = await self.redis.hgetall(self._key(job_id))
+        if not raw:
+            return None
+        return {name.decode(): orjson.loads(value) for name, value in raw.items()}
+
+    async def claim(self, job_id: str, name: str) -> bool:
+        """
+        Atomically set a marker field if it isn't set yet (HSETNX).
+        True for exactly one caller across all workers.
+        """
+        return bool(await self.redis.hsetnx(self._key(job_id), name, orjson.dumps(True)))
+
+    async def release(self, job_id: str, name: str) -> None:
+        """Remove a marker set by claim() so the work can be retried"""
+        await self.redis.hdel(self._key(job_id), name)
+
+    async def ping(self) -> bool:
+        """Readiness probe"""
+        return await self.redis.ping()
+
+    async def close(self) -> None:
+        """Close the Redis connection pool"""
+        await self.redis.aclose()
+
+
+# In-memory store for development without Redis
+class InMemoryJobStore:
+    """
+    In-memory job store for local development (single worker only)
+
+    Bounded: at most 10,000 jobs, each dropped JOB_TTL_SECONDS after its
+    last update, same as the Redis store.
+    """
+
+    def __init__(self):
+        self.jobs: TTLCache = TTLCache(maxsize=10_000, ttl=JOB_TTL_SECONDS)
+        self._lock = asyncio.Lock()
+
+    async def create(self, job_id: str, data: Dict[str, Any]) -> None:
+        """Store a new job"""
+        await self.update(job_id, **data)
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        """Set some fields of a job and refresh its TTL"""
+        async with self._lock:
+            # Re-assigning (rather than mutating in place) restarts the TTL
+            job = dict(self.jobs.get(job_id) or {})
+            job.update(fields)
+            self.jobs[job_id] = job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get all fields of a job, or None if it doesn't exist (or expired)"""
+        async with self._lock:
+            job = self.jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    async def claim(self, job_id: str, name: str) -> bool:
+        """Set a marker field if it isn't set yet; True for one caller only"""
+        async with self._lock:
+            job = dict(self.jobs.get(job_id) or {})
+            if job.get(name):
+                return False
+            job[name] = True
+            self.jobs[job_id] = job
+            return True
+
+    async def release(self, job_id: str, name: str) -> None:
+        """Remove a marker set by claim() so the work can be retried"""
+        async with self._lock:
+            job = self.jobs.get(job_id)
+            if job is not None and name in job:
+                job = dict(job)
+                del job[name]
+                self.jobs[job_id] = job
+
+    async def ping(self) -> bool:
+        return True
+
+    async def close(self) -> None:
+        pass
+
+
+# Use in-memory store if Redis is not reachable
+def get_job_store():
+    import redis
+
+    print(f"[Job Store] Initializing...")
+    try:
+        client = redis.Redis.from_url(settings.redis_url, socket_connect_timeout=1)
+        try:
+            client.ping()
+        finally:
+            client.close()
+    except Exception as e:
+        print(f"[Job Store] ⚠️  Redis not reachable at {settings.redis_url} ({e})")
+        print("[Job Store] ⚠️  Using IN-MEMORY job store - run a single API worker!")
+        return InMemoryJobStore()
+    
+    print(f"[Job Store] ✅ Using Redis job store")
+    return RedisJobStore()
+
+
+# Singleton instance
+job_store = get_job_store()
@@ -2,11 +2,99 @@
 RunPod service for GPU processing
 """
 import httpx
-import base64
-from typing import Optional, Dict, Any
+import asyncio
+import binascii
+import logging
+import uuid
+from typing import Optional, Dict, Any, Awaitable, Callable
+from cachetools import TTLCache
 from app.config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger("runpod")
+
+# How long status requests are collected before one batch goes out
+STATUS_BATCH_WINDOW_SECONDS = 0.05
+# Retries (exponential backoff) for idempotent RunPod calls on 429/5xx
+RUNPOD_MAX_RETRIES = 3
+# Base64 is decoded in slices this long (multiple of 4) so the GIL is
+# released between them while a large GLB decodes on a worker thread.
+# Slices only line up with 4-character groups once whitespace is removed.
+BASE64_DECODE_CHUNK = 64 * 1024
+# Final job statuses whose result is cached. COMPLETED is left out: its
+# output (inline files) is needed in full by whoever completes the job,
+# and a stripped copy could overwrite the real result.
+TERMINAL_STATUSES = {"FAILED", "CANCELLED", "TIMED_OUT"}
+TERMINAL_STATUS_CACHE_TTL = 3600  # seconds, like job state
+
+
+def _decode_files(files_base64: Dict[str, Any]) -> Dict[str, bytes]:
+    """Decode base64 file blobs (runs in a thread, off the event loop)"""
+    files_bytes = {}
+    for file_key, file_base64 in files_base64.items():
+        try:
+            data = file_base64.encode("ascii") if isinstance(file_base64, str) else bytes(file_base64)
+            # Drop line breaks/whitespace (wrapped base64) so every slice
+            # starts on a 4-character boundary
+            data = b"".join(data.split())
+            files_bytes[file_key] = b"".join(
+                binascii.a2b_base64(data[i:i + BASE64_DECODE_CHUNK])
+                for i in range(0, len(data), BASE64_DECODE_CHUNK)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to decode {file_key} base64: {e}")
+    return files_bytes
+
+
+class JobStatusBatcher:
+    """
+    Coalesces get_job_status calls made within a short window.
+    
+    Every job poller asks for its status on its own schedule; instead of one
+    GET per call, requests arriving within STATUS_BATCH_WINDOW_SECONDS are
+    flushed together (GETs issued concurrently on the shared client) and
+    concurrent requests for the same job_id share a single GET.
+    """
+    
+    def __init__(self, fetch: Callable[[str], Awaitable[Dict[str, Any]]]):
+        self._fetch = fetch
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._flush_scheduled = False
+        self._tasks = set()  # strong refs so in-flight batches aren't GC'd
+    
+    async def get(self, job_id: str) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        future = self._pending.get(job_id)
+        if future is None:
+            future = loop.create_future()
+            self._pending[job_id] = future
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            loop.call_later(STATUS_BATCH_WINDOW_SECONDS, self._flush)
+        # shield: one caller being cancelled must not cancel the shared result
+        return await asyncio.shield(future)
+    
+    def _flush(self):
+        batch, self._pending = self._pending, {}
+        self._flush_scheduled = False
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, batch: Dict[str, asyncio.Future]):
+        ids = list(batch)
+        results = await asyncio.gather(
+            *[self._fetch(job_id) for job_id in ids],
+            return_exceptions=True
+        )
+        for job_id, result in zip(ids, results):
+            future = batch[job_id]
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
 
 
 class RunPodService:
@@ -16,12 +104,55 @@ class RunPodService:
         self.api_key = settings.runpod_api_key
         self.endpoint_id = settings.runpod_endpoint_id
         self.base_url = f"https://api.runpod.ai/v2/{self.endpoint_id}"
+        # One client for every job's submit/poll calls, so connections (and
+        # TLS sessions) to api.runpod.ai stay open between polls. It is
+        # RunPod-only: base URL and auth header are set on the client.
+        # HTTP/2 multiplexes concurrent polls over few connections; the pool
+        # limits queue any overflow locally (backpressure) rather than
+        # opening a socket per request and drawing 429s from RunPod.
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            },
+            timeout=30.0,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=settings.runpod_max_conn,
+                max_keepalive_connections=settings.runpod_max_keepalive
+            )
+        )
+        # Caps requests in flight so a burst of polls waits here instead of
+        # exhausting the connection pool or RunPod's rate limit
+        self._sem = asyncio.Semaphore(settings.runpod_concurrency)
+        self._status_batcher = JobStatusBatcher(self._fetch_job_status)
+        # Failed/cancelled results by job_id, so clients still polling a
+        # dead job don't cost a RunPod GET each time
+        self._terminal: TTLCache = TTLCache(maxsize=4096, ttl=TERMINAL_STATUS_CACHE_TTL)
+    
+    async def close(self):
+        """Close the HTTP client (app shutdown)"""
+        await self._client.aclose()
+    
+    async def _request(self, method: str, path: str, retry: bool = True, **kwargs) -> httpx.Response:
+        """
+        Send a request to the RunPod API, at most runpod_concurrency at once.
         
-    def _get_headers(self) -> Dict[str, str]:
-        return {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        With retry, 429 and 5xx answers are retried with exponential backoff
+        (0.5s, 1s, 2s) so transient spikes don't fail jobs. Only for
+        idempotent calls - a retried /run could start the job twice.
+        """
+        attempts = RUNPOD_MAX_RETRIES + 1 if retry else 1
+        for attempt in range(attempts):
+            async with self._sem:
+                response = await self._client.request(method, path, **kwargs)
+            if response.status_code != 429 and response.status_code < 500:
+                return response
+            if attempt + 1 < attempts:
+                logger.warning(f"⚠ {method} {path} -> {response.status_code}, retrying")
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        return response
     
     async def submit_avatar_job(
         self,
@@ -29,11 +160,17 @@ class RunPodService:
         height: int,
         weight: Optional[int],
         gender: str,
-        user_id: str
+        user_id: str,
+        webhook: Optional[str] = None,
+        upload_urls: Optional[Dict[str, Dict[str, str]]] = None
     ) -> Optional[str]:
         """
         Submit avatar creation job to RunPod
         Returns job_id if successful
+        
+        If webhook is given, RunPod POSTs the final job status to it.
+        upload_urls (from SupabaseService.create_presigned_uploads) lets the
+        worker upload its output files directly to storage.
         """
         payload = {
             "input": {
@@ -44,117 +181,131 @@ class RunPodService:
                 "user_id": user_id,
             }
         }
+        if upload_urls:
+            payload["input"]["upload_urls"] = upload_urls
+        if webhook:
+            payload["webhook"] = webhook
         
-        url = f"{self.base_url}/run"
-        print(f"[RunPod] Submitting job to: {url}")
-        print(f"[RunPod] Payload: {payload}")
-        print(f"[RunPod] Headers: Authorization={'SET' if self.api_key else 'NOT SET'}")
+        # Verbose dumps only at DEBUG (skips building the strings otherwise)
+        verbose = logger.isEnabledFor(logging.DEBUG)
+        if verbose:
+            logger.debug(f"Submitting job to: {self.base_url}/run")
+            logger.debug(f"Payload: {payload['input'].get('photo_url', '')[:100]}... ({len(upload_urls or {})} upload URLs)")
+            logger.debug(f"Headers: Authorization={'SET' if self.api_key else 'NOT SET'}")
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    json=payload,
-                    headers=self._get_headers(),
-                    timeout=30.0
-                )
-                
-                print(f"[RunPod] Response status: {response.status_code}")
-                print(f"[RunPod] Response body: {response.text[:500]}")
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    job_id = data.get("id")
-                    if job_id:
-                        print(f"[RunPod] ✅ Job submitted successfully: {job_id}")
-                        return job_id
-                    else:
-                        print(f"[RunPod] ⚠️  Response missing 'id' field: {data}")
-                        return None
+            response = await self._request("POST", "/run", retry=False, json=payload)
+            
+            if verbose:
+                logger.debug(f"Response status: {response.status_code}")
+                logger.debug(f"Response body: {response.text[:500]}")
+            
+            if response.status_code == 200:
+                data = response.json()
+                job_id = data.get("id")
+                if job_id:
+                    logger.info(f"✓ Job submitted successfully: {job_id}")
+                    return job_id
                 else:
-                    print(f"[RunPod] ❌ Submit error: {response.status_code}")
-                    print(f"[RunPod] Response: {response.text}")
+                    logger.warning(f"⚠ Response missing 'id' field: {data}")
                     return None
+            else:
+                logger.error(f"Submit error: {response.status_code}")
+                logger.error(f"Response: {response.text}")
+                return None
         except Exception as e:
-            print(f"[RunPod] ❌ Exception submitting job: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"Exception submitting job: {e}")
             return None
     
     async def get_job_status(self, job_id: str) -> Dict[str, Any]:
         """
-        Get status of a RunPod job
+        Get status of a RunPod job (batched, see JobStatusBatcher)
+        Returns: {status, output, error}
+        
+        Failed and cancelled results are cached per job_id (see TERMINAL_STATUSES).
+        """
+        cached = self._terminal.get(job_id)
+        if cached is not None:
+            return cached
+        
+        result = await self._status_batcher.get(job_id)
+        if result.get("status") in TERMINAL_STATUSES:
+            self._terminal[job_id] = result
+        return result
+    
+    async def _fetch_job_status(self, job_id: str) -> Dict[str, Any]:
+        """
+        Fetch status of a RunPod job
         Returns: {status, output, error}
         
         Output contains:
-        - avatar_glb_base64: Base64-encoded GLB file
+        - file_urls: Storage URLs of files the worker uploaded itself
+        - files_bytes: Decoded bytes of files returned inline (base64,
+          only from older workers or if the GLB upload failed)
+        - failed_uploads: Files the worker could not upload (not returned)
         - measurements: Standardized measurements dict
-        - processing_time_seconds: Time taken
+        - processing_time: Time taken
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/status/{job_id}",
-                headers=self._get_headers(),
-                timeout=30.0
-            )
+        response = await self._request("GET", f"/status/{job_id}")
+        
+        if response.status_code == 200:
+            data = response.json()
+            status = data.get("status", "UNKNOWN")
+            output = data.get("output", {})
+            error = data.get("error")
             
-            if response.status_code == 200:
-                data = response.json()
-                status = data.get("status", "UNKNOWN")
-                output = data.get("output", {})
-                error = data.get("error")
-                
-                # Debug logging
-                print(f"[RunPod] Job {job_id} status: {status}")
-                if error:
-                    print(f"[RunPod] Job {job_id} error: {error}")
+            # Per-poll status (DEBUG)
+            logger.debug(f"Job {job_id} status: {status}")
+            if error:
+                logger.warning(f"Job {job_id} error: {error}")
+            
+            # Transform output to expected format
+            processed_output = None
+            if output:
+                processed_output = {
+                    "measurements": output.get("measurements", {}),
+                    "processing_time": output.get("processing_time_seconds"),
+                    # Files the worker uploaded via presigned URLs
+                    "file_urls": output.get("file_urls", {}),
+                    # All files as decoded bytes dict
+                    "files_bytes": {},
+                    "file_sizes": output.get("file_sizes", {}),
+                    "failed_uploads": output.get("failed_uploads", []),
+                }
                 
-                # Transform output to expected format
-                processed_output = None
-                if output:
-                    processed_output = {
-                        "measurements": output.get("measurements", {}),
-                        "processing_time": output.get("processing_time_seconds"),
-                        # All files as decoded bytes dict
-                        "files_bytes": {},
-                        "file_sizes": output.get("file_sizes", {}),
-                    }
-                    
-                    # Decode all base64 files
-                    files_base64 = output.get("files_base64", {})
-                    if not files_base64:
-                        # Fallback to old format (single GLB)
-                        if output.get("avatar_glb_base64"):
-                            files_base64 = {"avatar_glb": output["avatar_glb_base64"]}
-                    
-                    for file_key, file_base64 in files_base64.items():
-                        try:
-                            processed_output["files_bytes"][file_key] = base64.b64decode(
-                                file_base64
-                            )
-                        except Exception as e:
-                            print(f"Failed to decode {file_key} base64: {e}")
+                # Decode all base64 files
+                files_base64 = output.get("files_base64", {})
+                if not files_base64:
+                    # Fallback to old format (single GLB)
+                    if output.get("avatar_glb_base64"):
+                        files_base64 = {"avatar_glb": output["avatar_glb_base64"]}
                 
-                return {
-                    "status": data.get("status", "UNKNOWN"),
-                    "output": processed_output,
-                    "error": data.get("error"),
-                }
-            else:
-                return {
-                    "status": "ERROR",
-                    "error": f"Failed to get status: {response.status_code}"
-                }
+                if files_base64:
+                    processed_output["files_bytes"] = await asyncio.to_thread(
+                        _decode_files, files_base64
+                    )
+            
+            return {
+                "status": data.get("status", "UNKNOWN"),
+                "output": processed_output,
+                "error": data.get("error"),
+            }
+        else:
+            return {
+                "status": "ERROR",
+                "error": f"Failed to get status: {response.status_code}"
+            }
+    
+    async def ping(self) -> bool:
+        """Readiness probe: endpoint health (workers/queue) answers"""
+        response = await self._request("GET", "/health", retry=False, timeout=5.0)
+        return response.status_code == 200
     
     async def cancel_job(self, job_id: str) -> bool:
         """Cancel a running job"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/cancel/{job_id}",
-                headers=self._get_headers(),
-                timeout=30.0
-            )
-            return response.status_code == 200
+        self._terminal.pop(job_id, None)
+        response = await self._request("POST", f"/cancel/{job_id}")
+        return response.status_code == 200
 
 
 # Mock service for development without RunPod
@@ -167,10 +318,11 @@ class MockRunPodService:
         height: int,
         weight: Optional[int],
         gender: str,
-        user_id: str
+        user_id: str,
+        webhook: Optional[str] = None,
+        upload_urls: Optional[Dict[str, Dict[str, str]]] = None
     ) -> str:
         """Mock job submission - returns fake job ID"""
-        import uuid
         return f"mock-{uuid.uuid4().hex[:8]}"
     
     async def get_job_status(self, job_id: str) -> Dict[str, Any]:
@@ -196,6 +348,12 @@ class MockRunPodService:
     
     async def cancel_job(self, job_id: str) -> bool:
         return True
+    
+    async def ping(self) -> bool:
+        return True
+    
+    async def close(self):
+        pass
 
 
 # Use mock service if RunPod not configured
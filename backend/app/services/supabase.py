@@ -2,15 +2,71 @@
 Supabase service for database and storage operations
 """
 from supabase import create_client, Client
+from cachetools import TTLCache
 from functools import lru_cache
-from typing import Optional, Dict, Any
-from datetime import datetime
+from typing import Optional, Dict, Any, Sequence
+from datetime import datetime, timezone
+import asyncio
 
 from app.config import get_settings
+from app.services.cache import cache
+from app.db import session as db
 
 
 settings = get_settings()
 
+# Max pipeline files uploaded at once (keeps Supabase connections bounded)
+PIPELINE_UPLOAD_CONCURRENCY = 6
+
+# Signed photo URLs are reused for this long (they are created valid for
+# an hour, so a reused URL still has 10+ minutes left)
+SIGNED_URL_CACHE_TTL = 3000
+
+# Fit passports read by the polled GET endpoints are cached this long;
+# every update through this service invalidates the entry
+FIT_PASSPORT_CACHE_TTL = 15
+
+# Storage filename for each pipeline output file key
+PIPELINE_FILENAMES = {
+    "avatar_glb": "avatar_textured.glb",
+    "skin_texture": "skin_texture.png",
+    "original_mesh": "body_original.obj",
+    "smpl_params": "smpl_params.npz",
+    "tpose_mesh": "body_tpose.obj",
+    "apose_mesh": "body_apose.obj",
+    "measurements": "measurements.json",
+    "face_crop": "face_crop.png",
+    "avatar_texture": "avatar_texture.png",
+    "skin_detection_mask": "skin_detection_mask.png",
+}
+
+# Files the worker returns by default, i.e. the ones worth presigning for a
+# job. Left out: tpose_mesh (only with save_debug_meshes) and the
+# skin_detection_mask debug visualization.
+WORKER_OUTPUT_KEYS = (
+    "avatar_glb",
+    "measurements",
+    "apose_mesh",
+    "original_mesh",
+    "smpl_params",
+    "skin_texture",
+    "avatar_texture",
+    "face_crop",
+)
+
+
+def _content_type(filename: str) -> str:
+    """Content type for a pipeline file, by extension"""
+    if filename.endswith(".glb"):
+        return "model/gltf-binary"
+    elif filename.endswith(".obj"):
+        return "model/obj"
+    elif filename.endswith(".png"):
+        return "image/png"
+    elif filename.endswith(".json"):
+        return "application/json"
+    return "application/octet-stream"
+
 
 @lru_cache()
 def get_supabase_client() -> Client:
@@ -26,6 +82,9 @@ class SupabaseService:
     
     def __init__(self):
         self.client = get_supabase_client()
+        # (bucket, path, expires_in) -> signed URL; retries and repeated
+        # submissions of the same photo skip the Supabase round trip
+        self._signed_urls: TTLCache = TTLCache(maxsize=512, ttl=SIGNED_URL_CACHE_TTL)
     
     # ==========================================
     # FIT PASSPORT OPERATIONS
@@ -36,6 +95,24 @@ class SupabaseService:
         response = self.client.table("fit_passports").select("*").eq("user_id", user_id).single().execute()
         return response.data if response.data else None
     
+    @staticmethod
+    def _fit_passport_key(user_id: str) -> str:
+        return f"fp:{user_id}"
+    
+    async def get_fit_passport_cached(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get fit passport, served from cache for FIT_PASSPORT_CACHE_TTL"""
+        key = self._fit_passport_key(user_id)
+        fit_passport = await cache.get(key)
+        if fit_passport is None:
+            if db.engine is not None:
+                # Pooled Postgres read, no PostgREST round trip
+                fit_passport = await db.read_fit_passport(user_id)
+            else:
+                fit_passport = await self.get_fit_passport(user_id)
+            if fit_passport:
+                await cache.set(key, fit_passport, FIT_PASSPORT_CACHE_TTL)
+        return fit_passport
+    
     async def update_fit_passport_status(
         self, 
         user_id: str, 
@@ -43,17 +120,19 @@ class SupabaseService:
         progress_message: str = ""
     ) -> bool:
         """Update processing status"""
+        now = datetime.now(timezone.utc).isoformat()
         update_data = {
             "status": status,
-            "updated_at": datetime.utcnow().isoformat()
+            "updated_at": now
         }
         
         if status == "processing":
-            update_data["processing_started_at"] = datetime.utcnow().isoformat()
+            update_data["processing_started_at"] = now
         elif status in ["completed", "failed"]:
-            update_data["processing_completed_at"] = datetime.utcnow().isoformat()
+            update_data["processing_completed_at"] = now
         
         response = self.client.table("fit_passports").update(update_data).eq("user_id", user_id).execute()
+        await cache.delete(self._fit_passport_key(user_id))
         return len(response.data) > 0
     
     async def update_fit_passport_with_results(
@@ -65,12 +144,13 @@ class SupabaseService:
         pipeline_files: Optional[Dict[str, str]] = None
     ) -> bool:
         """Update fit passport with avatar and measurements"""
+        now = datetime.now(timezone.utc).isoformat()
         update_data = {
             "avatar_url": avatar_url,
             "avatar_thumbnail_url": thumbnail_url,
             "status": "completed",
-            "processing_completed_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat(),
+            "processing_completed_at": now,
+            "updated_at": now,
             # Measurements
             "chest": measurements.get("chest"),
             "waist": measurements.get("waist"),
@@ -90,6 +170,7 @@ class SupabaseService:
             update_data["pipeline_files"] = pipeline_files
         
         response = self.client.table("fit_passports").update(update_data).eq("user_id", user_id).execute()
+        await cache.delete(self._fit_passport_key(user_id))
         return len(response.data) > 0
     
     async def update_measurements(
@@ -99,11 +180,12 @@ class SupabaseService:
     ) -> bool:
         """Update only measurements (user-corrected)"""
         update_data = {
-            "updated_at": datetime.utcnow().isoformat(),
+            "updated_at": datetime.now(timezone.utc).isoformat(),
             **measurements
         }
         
         response = self.client.table("fit_passports").update(update_data).eq("user_id", user_id).execute()
+        await cache.delete(self._fit_passport_key(user_id))
         return len(response.data) > 0
     
     # ==========================================
@@ -127,17 +209,26 @@ class SupabaseService:
     # ==========================================
     
     def get_photo_signed_url(self, photo_path: str, expires_in: int = 3600) -> str:
-        """Get signed URL for private photo"""
+        """Get signed URL for private photo (cached for SIGNED_URL_CACHE_TTL)"""
+        cache_key = (settings.photos_bucket, photo_path, expires_in)
+        cached = self._signed_urls.get(cache_key)
+        if cached:
+            return cached
+        
         try:
             response = self.client.storage.from_(settings.photos_bucket).create_signed_url(
                 photo_path, 
                 expires_in
             )
+            signed_url = ""
             if isinstance(response, dict):
-                return response.get("signedURL", "")
+                signed_url = response.get("signedURL", "")
             elif hasattr(response, "signedURL"):
-                return response.signedURL
-            return ""
+                signed_url = response.signedURL
+            # Only cache URLs that outlive the cache entry
+            if signed_url and expires_in > SIGNED_URL_CACHE_TTL:
+                self._signed_urls[cache_key] = signed_url
+            return signed_url
         except Exception as e:
             print(f"[Supabase] Error creating signed URL for {photo_path}: {e}")
             return ""
@@ -155,27 +246,25 @@ class SupabaseService:
         print(f"[Supabase] Uploading to: avatars/{file_path} (user_id: {user_id})")
         
         # Determine content type based on extension
-        content_type = "application/octet-stream"
-        if filename.endswith(".glb"):
-            content_type = "model/gltf-binary"
-        elif filename.endswith(".obj"):
-            content_type = "model/obj"
-        elif filename.endswith(".png"):
-            content_type = "image/png"
-        elif filename.endswith(".json"):
-            content_type = "application/json"
-        elif filename.endswith(".npz"):
-            content_type = "application/octet-stream"
-        
-        self.client.storage.from_(settings.avatars_bucket).upload(
+        content_type = _content_type(filename)
+        
+        # The Supabase client is synchronous; run it in a thread so uploads
+        # don't block the event loop and can overlap
+        return await asyncio.to_thread(
+            self._upload_file_sync, file_path, file_data, content_type
+        )
+    
+    def _upload_file_sync(self, file_path: str, file_data: bytes, content_type: str) -> str:
+        """Upload to the avatars bucket and return the public URL (blocking)"""
+        bucket = self.client.storage.from_(settings.avatars_bucket)
+        bucket.upload(
             file_path,
             file_data,
             {"content-type": content_type}
         )
         
         # Get public URL
-        public_url = self.client.storage.from_(settings.avatars_bucket).get_public_url(file_path)
-        return public_url
+        return bucket.get_public_url(file_path)
     
     async def upload_pipeline_files(
         self, 
@@ -186,6 +275,9 @@ class SupabaseService:
         """
         Upload all pipeline output files to Supabase storage.
         
+        Files are uploaded concurrently (at most PIPELINE_UPLOAD_CONCURRENCY
+        at a time); a failed file is logged and left out of the result.
+        
         Args:
             user_id: User ID for folder organization
             files_bytes: Dict of {file_key: bytes_data}
@@ -196,32 +288,91 @@ class SupabaseService:
         """
         if file_key_to_filename is None:
             # Default filename mapping
-            file_key_to_filename = {
-                "avatar_glb": "avatar_textured.glb",
-                "skin_texture": "skin_texture.png",
-                "original_mesh": "body_original.obj",
-                "smpl_params": "smpl_params.npz",
-                "tpose_mesh": "body_tpose.obj",
-                "apose_mesh": "body_apose.obj",
-                "measurements": "measurements.json",
-                "face_crop": "face_crop.png",
-                "avatar_texture": "avatar_texture.png",
-                "skin_detection_mask": "skin_detection_mask.png",
-            }
+            file_key_to_filename = PIPELINE_FILENAMES
         
-        uploaded_urls = {}
+        semaphore = asyncio.Semaphore(PIPELINE_UPLOAD_CONCURRENCY)
         
-        for file_key, file_data in files_bytes.items():
+        async def _upload_one(file_key: str, file_data: bytes) -> str:
             filename = file_key_to_filename.get(file_key, f"{file_key}.bin")
-            try:
+            async with semaphore:
                 url = await self.upload_avatar(user_id, file_data, filename)
-                uploaded_urls[file_key] = url
-                print(f"Uploaded {file_key} -> {filename} ({len(file_data) / 1024:.1f} KB)")
+            print(f"Uploaded {file_key} -> {filename} ({len(file_data) / 1024:.1f} KB)")
+            return url
+        
+        # return_exceptions: one failed file doesn't cancel the others
+        file_keys = list(files_bytes)
+        results = await asyncio.gather(
+            *[_upload_one(file_key, files_bytes[file_key]) for file_key in file_keys],
+            return_exceptions=True
+        )
+        
+        file_urls = {}
+        for file_key, result in zip(file_keys, results):
+            if isinstance(result, BaseException):
+                print(f"Failed to upload {file_key}: {result}")
+            elif result:
+                file_urls[file_key] = result
+        return file_urls
+    
+    def _create_presigned_upload_sync(self, file_path: str) -> str:
+        """Create a signed upload URL in the avatars bucket (blocking)"""
+        response = self.client.storage.from_(settings.avatars_bucket).create_signed_upload_url(file_path)
+        return response.get("signed_url") or response.get("signedUrl") or ""
+    
+    async def create_presigned_uploads(
+        self,
+        user_id: str,
+        file_keys: Optional[Sequence[str]] = None
+    ) -> Dict[str, Dict[str, str]]:
+        """
+        Create presigned upload URLs for pipeline output files.
+        
+        The RunPod worker PUTs its files straight to storage with these, so
+        the bytes don't pass through this API. Paths match upload_avatar
+        (avatars/{user_id}/{filename}).
+        
+        Args:
+            user_id: Owner of the files
+            file_keys: Files to presign (default: every PIPELINE_FILENAMES
+                key; jobs pass WORKER_OUTPUT_KEYS)
+        
+        Returns:
+            Dict of {file_key: {"upload_url", "public_url", "content_type"}};
+            keys whose URL could not be created are left out
+        """
+        if file_keys is None:
+            file_keys = list(PIPELINE_FILENAMES)
+        bucket = self.client.storage.from_(settings.avatars_bucket)
+        
+        async def _presign_one(file_key: str):
+            filename = PIPELINE_FILENAMES.get(file_key, f"{file_key}.bin")
+            file_path = f"{user_id}/{filename}"
+            try:
+                upload_url = await asyncio.to_thread(self._create_presigned_upload_sync, file_path)
             except Exception as e:
-                print(f"Failed to upload {file_key}: {e}")
-                # Continue with other files
+                print(f"[Supabase] Error creating upload URL for {file_path}: {e}")
+                return file_key, None
+            if not upload_url:
+                return file_key, None
+            return file_key, {
+                "upload_url": upload_url,
+                "public_url": bucket.get_public_url(file_path),
+                "content_type": _content_type(filename),
+            }
         
-        return uploaded_urls
+        results = await asyncio.gather(*[_presign_one(file_key) for file_key in file_keys])
+        return {file_key: target for file_key, target in results if target}
+    
+    # ==========================================
+    # HEALTH
+    # ==========================================
+    
+    async def ping(self) -> bool:
+        """Readiness probe: smallest possible PostgREST query"""
+        await asyncio.to_thread(
+            lambda: self.client.table("fit_passports").select("user_id").limit(1).execute()
+        )
+        return True
     
     # ==========================================
     # ANALYTICS OPERATIONS
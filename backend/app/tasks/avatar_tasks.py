@@ -2,95 +2,38 @@
 Avatar creation background tasks
 """
 from app.tasks.celery_app import celery_app
-from app.services.supabase import supabase_service
-from app.services.runpod import runpod_service
 import asyncio
 
+# One event loop per worker process, reused by every task: the Redis job
+# store's and RunPod client's connections belong to the loop they were
+# opened on. Created explicitly - asyncio.get_event_loop() without a
+# running loop is deprecated.
+_loop = None
 
-@celery_app.task(bind=True, max_retries=3)
-def create_avatar_task(
-    self,
-    user_id: str,
-    photo_url: str,
-    height: int,
-    weight: int | None,
-    gender: str
-):
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+# acks_late: the message is only removed from the Redis queue once the job
+# has run, so a worker that dies mid-job leaves it for another worker.
+# process_avatar_job is safe to re-run: finished jobs are skipped and an
+# already submitted RunPod job is resumed, not submitted again.
+@celery_app.task(acks_late=True, reject_on_worker_lost=True)
+def process_avatar_job_task(job_id: str, request_data: dict):
     """
-    Celery task for avatar creation
+    Celery task running the API's avatar job (submit, poll, store results)
     
-    This runs in a worker process, handling:
-    1. Submit to RunPod GPU
-    2. Poll for completion
-    3. Update database with results
+    Queued by POST /api/avatar/create when AVATAR_JOBS_VIA_CELERY is set;
+    job progress goes to the shared job store as usual.
     """
-    try:
-        # Run async code in sync context
-        loop = asyncio.get_event_loop()
-        
-        # Update status
-        loop.run_until_complete(
-            supabase_service.update_fit_passport_status(
-                user_id=user_id,
-                status="processing"
-            )
-        )
-        
-        # Submit to RunPod
-        runpod_job_id = loop.run_until_complete(
-            runpod_service.submit_avatar_job(
-                photo_url=photo_url,
-                height=height,
-                weight=weight,
-                gender=gender,
-                user_id=user_id
-            )
-        )
-        
-        if not runpod_job_id:
-            raise Exception("Failed to submit job to GPU")
-        
-        # Poll for completion
-        max_attempts = 60
-        for attempt in range(max_attempts):
-            asyncio.get_event_loop().run_until_complete(asyncio.sleep(5))
-            
-            status_result = loop.run_until_complete(
-                runpod_service.get_job_status(runpod_job_id)
-            )
-            
-            if status_result.get("status") == "COMPLETED":
-                output = status_result.get("output", {})
-                
-                # Update database with results
-                loop.run_until_complete(
-                    supabase_service.update_fit_passport_with_results(
-                        user_id=user_id,
-                        avatar_url=output.get("avatar_url"),
-                        measurements=output.get("measurements", {})
-                    )
-                )
-                
-                return {
-                    "success": True,
-                    "avatar_url": output.get("avatar_url"),
-                    "measurements": output.get("measurements")
-                }
-            
-            elif status_result.get("status") in ["FAILED", "CANCELLED"]:
-                raise Exception(status_result.get("error", "GPU processing failed"))
-        
-        raise Exception("Avatar creation timed out")
-        
-    except Exception as e:
-        # Update status to failed
-        loop = asyncio.get_event_loop()
-        loop.run_until_complete(
-            supabase_service.update_fit_passport_status(
-                user_id=user_id,
-                status="failed"
-            )
-        )
-        
-        # Retry if we haven't exceeded max retries
-        raise self.retry(exc=e, countdown=30)
+    from app.api.routes.avatar import process_avatar_job
+    from app.models.avatar import AvatarCreateRequest
+    
+    request = AvatarCreateRequest.model_validate(request_data)
+    
+    _get_loop().run_until_complete(process_avatar_job(job_id, request))